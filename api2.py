@@ -1,9 +1,39 @@
 # -*- coding: UTF-8 -*-
-from .wrapper import Entity
+import asyncio
+from collections import OrderedDict
+from concurrent import futures
+from itertools import islice
+
+from .asyncwrapper import AsyncClient
+from .wrapper import Entity, IdentityMap, nextPageUrl
 from .fields import *
 
 class Api2Entity(Entity):
 	default_api_base = 'http://openmensa.org/api/v2/'
+	#: :class:`IdentityMap` of the loaded entities by id; `None` for
+	#: models without ids
+	identityMap = None
+
+	@classmethod
+	def _lookup(cls, id=None, *args, **kwargs):
+		if id and cls.identityMap is not None:
+			return cls.identityMap.get(int(id))
+
+	@classmethod
+	def fromValues(cls, values):
+		""" Creates an entity from decoded API data. Entities which are
+		already in the identity map are updated and returned instead. """
+		identityMap = cls.identityMap
+		id = values.get('id') if identityMap is not None else None
+		if id is None:
+			return cls(values=values)
+		entity = identityMap.peek(id)
+		if entity is None:
+			entity = cls(values=values)
+		else:
+			entity.fromJsonDict(values)
+		identityMap.add(id, entity)
+		return entity
 
 	def __repr__(self):
 		return self._type + '(' + ','.join(map(lambda v: v + '=' + repr(getattr(self, v)), self._fields)) + ')'
@@ -15,17 +45,89 @@ class Canteen(Api2Entity):
 	latitude = FloatField()
 	longitude = FloatField()
 
+	identityMap = IdentityMap()
+
 	def __init__(self, id=None, values={}):
 		super(Canteen, self).__init__()
 		if id:
 			self.fromJsonDict(self.request('canteens/{id}'.format(id=int(id))))
+			self.identityMap.add(self.id, self)
 		else:
 			self.fromJsonDict(values)
 
+	#: maximal number of ids requested at once by :meth:`find`, keeps the
+	#: urls far below the usual length limits
+	idsPerRequest = 100
+
+	@staticmethod
+	def find(limit=None, ids=None, near=None, entities=None, workers=4):
+		""" Searches canteens and follows the pages of the results until
+		`limit` canteens are found. Large `ids` lists are split into
+		requests of `idsPerRequest` ids which are sent concurrently by up to
+		`workers` threads; the canteens are returned in the order of `ids`
+		(every id once).
+
+		:param int limit: maximal number of returned canteens (and canteens
+			per page); `None` returns all canteens
+		:param entities: mapping from id to already known canteens, defaults
+			to the :class:`IdentityMap` of the canteens; these ids are not
+			requested again and new canteens are added
+		"""
+		if not ids:
+			return list(islice(Canteen.iterFind(limit=limit, near=near), limit or None))
+		ids = list(OrderedDict.fromkeys(int(id) for id in ids))
+		if entities is None:
+			entities = Canteen.identityMap
+		found = dict((id, entities.get(id)) for id in ids)
+		missing = [id for id in ids if found[id] is None]
+		chunks = [missing[start:start + Canteen.idsPerRequest]
+			for start in range(0, len(missing), Canteen.idsPerRequest)]
+		fetchChunk = lambda chunk: list(Canteen.iterFind(limit=limit, ids=chunk, near=near))
+		if len(chunks) > 1 and workers > 1:
+			with futures.ThreadPoolExecutor(min(workers, len(chunks))) as executor:
+				results = list(executor.map(fetchChunk, chunks))
+		else:
+			results = map(fetchChunk, chunks)
+		for canteens in results:
+			for canteen in canteens:
+				found[canteen.id] = entities[canteen.id] = canteen
+		canteens = [found[id] for id in ids if found[id] is not None]
+		return canteens[:limit] if limit else canteens
+
+	@staticmethod
+	def iterFind(limit=None, ids=None, near=None, prefetch=False):
+		""" Generator version of :meth:`find` which follows the pages of
+		the API (Link or X-Total-Pages headers) and yields the canteens of
+		every page as they are decoded; only one page is kept in memory.
+
+		:param int limit: number of canteens per page
+		:param bool prefetch: request the next page in a background thread
+			while the current one is consumed
+		"""
+		def fetchPage(url):
+			entity = Canteen()
+			content = entity.fetch(url)
+			return content, nextPageUrl(url, entity.headers)
+
+		url = Canteen().url('canteens', Canteen._findParams(limit, ids, near))
+		executor = futures.ThreadPoolExecutor(1) if prefetch else None
+		try:
+			page = fetchPage(url)
+			while True:
+				content, url = page
+				if url and executor:
+					page = executor.submit(fetchPage, url)
+				for values in content:
+					yield Canteen.fromValues(values)
+				if not url:
+					break
+				page = page.result() if executor else fetchPage(url)
+		finally:
+			if executor:
+				executor.shutdown(wait=False)
+
 	@staticmethod
-	def find(limit=None, ids=None, near=None):
-		recvCanteens = lambda **kwargs: list(map(lambda c: Canteen(values=c),
-			Canteen().request('canteens', params=kwargs)))
+	def _findParams(limit=None, ids=None, near=None):
 		params = {}
 		if limit:
 			params['limit'] = limit
@@ -35,11 +137,71 @@ class Canteen(Api2Entity):
 			params.update({ 'near[lat]': near[0], 'near[lng]': near[1] })
 			if len(near) > 2:
 				params['near[dist]'] = near[2]
-		return recvCanteens(**params)
+		return params
+
+	def days(self):
+		""" Yields the :class:`Day` entries of this canteen while the
+		response is read. """
+		for values in self.iterRequest('canteens/{id}/days'.format(id=self.id)):
+			yield Day(values=values)
+
+	def meals(self, date):
+		""" Yields the :class:`Meal` objects of `date` (:class:`datetime.date`
+		or ISO formatted string) while the response is read, so large
+		menus are never decoded at once. """
+		for values in self.iterRequest('canteens/{id}/days/{date}/meals'.format(
+				id=self.id, date=date)):
+			yield Meal(values=values)
 
 	def __str__(self):
-		return 'Canteen({id}: {name})'.format(**self.__dict__)
+		return 'Canteen({id}: {name})'.format(id=self.id, name=self.name)
+
+
+class Day(Api2Entity):
+	date = DateField()
+	closed = BooleanField()
+
+	def __init__(self, values={}):
+		super(Day, self).__init__()
+		self.fromJsonDict(values)
 
 
 class Meal(Api2Entity):
-	pass
+	id = IntegerField()
+	name = StringField()
+	category = StringField()
+	prices = DictField()
+	notes = ListField()
+
+	def __init__(self, values={}):
+		super(Meal, self).__init__()
+		self.fromJsonDict(values)
+
+
+class AsyncCanteen(AsyncClient):
+	""" asyncio client for canteens: fetches many canteens concurrently
+	over a pool of keep-alive connections.
+
+	.. code:: python
+
+		async with AsyncCanteen(limit=20, limitPerHost=6) as client:
+			canteens = await client.getMany(range(1, 501))
+	"""
+	entity = Canteen
+
+	async def get(self, id):
+		""" Returns the canteen from the identity map or requests it. """
+		canteen = self.lookup(int(id))
+		if canteen is None:
+			canteen = self.create(await self.request('canteens/{id}'.format(id=int(id))))
+		return canteen
+
+	async def getMany(self, ids):
+		""" Fetches every canteen which is not in the identity map with its
+		own request (every id once); at most `limit` (`limitPerHost` per
+		host) requests are running at once. The canteens are returned in
+		the order of `ids`. """
+		ids = [int(id) for id in ids]
+		unique = list(OrderedDict.fromkeys(ids))
+		canteens = dict(zip(unique, await asyncio.gather(*[self.get(id) for id in unique])))
+		return [canteens[id] for id in ids]
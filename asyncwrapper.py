@@ -0,0 +1,213 @@
+import asyncio
+from urllib.parse import urljoin, urlparse, urlunparse
+
+from .wrapper import buildUrl, decodeContent
+
+
+class HTTPError(Exception):
+	""" Raised for responses with an error status code. """
+	def __init__(self, url, status, reason):
+		super(HTTPError, self).__init__('{0} {1} for {2}'.format(status, reason, url))
+		self.url = url
+		self.status = status
+		self.reason = reason
+
+
+class Response(object):
+	""" Received HTTP response with lower case header names. """
+	def __init__(self, url, status, reason, headers, body):
+		self.url = url
+		self.status = status
+		self.reason = reason
+		self.headers = headers
+		self.body = body
+
+	def content(self):
+		""" Decoded body like :meth:`Entity.request` returns it. """
+		return decodeContent(self.headers.get('content-type'), self.body)
+
+
+class ConnectionPool(object):
+	""" Minimal asyncio HTTP/1.1 client which keeps connections alive and
+	reuses them for the following requests to the same host.
+
+	:param int limit: maximal number of concurrent requests
+	:param int limitPerHost: maximal number of concurrent requests (and
+		open connections) per host
+	:param float timeout: seconds to wait for connecting and for every
+		response; `None` waits forever
+	"""
+	def __init__(self, limit=20, limitPerHost=6, timeout=30):
+		self.limit = limit
+		self.limitPerHost = limitPerHost
+		self.timeout = timeout
+		self._semaphore = None
+		self._hostSemaphores = {}
+		self._idle = {}
+		#: number of opened TCP connections
+		self.connections = 0
+		#: number of requests sent over already used connections
+		self.reused = 0
+
+	#: redirect status codes which are followed with a new GET request
+	redirectCodes = (301, 302, 303, 307, 308)
+	#: maximal number of redirects followed for one request
+	maxRedirects = 10
+
+	async def request(self, url, headers={}):
+		""" Sends a GET request and returns the :class:`Response`; follows
+		redirects and raises :exc:`HTTPError` for other status codes >= 300. """
+		for _ in range(self.maxRedirects + 1):
+			response = await self._request(url, headers)
+			if response.status not in self.redirectCodes or 'location' not in response.headers:
+				break
+			url = urljoin(url, response.headers['location'])
+		if response.status >= 300:
+			raise HTTPError(response.url, response.status, response.reason)
+		return response
+
+	async def _request(self, url, headers):
+		parts = urlparse(url)
+		secure = parts.scheme == 'https'
+		key = (parts.hostname, parts.port or (443 if secure else 80), secure)
+		target = urlunparse(['', '', parts.path or '/', parts.params, parts.query, ''])
+		lines = ['GET {0} HTTP/1.1'.format(target), 'Host: ' + parts.netloc,
+			'Accept-Encoding: identity']
+		lines.extend('{0}: {1}'.format(name, value) for name, value in headers.items())
+		message = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+		if self._semaphore is None:
+			self._semaphore = asyncio.Semaphore(self.limit)
+		if key not in self._hostSemaphores:
+			self._hostSemaphores[key] = asyncio.Semaphore(self.limitPerHost)
+		async with self._semaphore, self._hostSemaphores[key]:
+			return await asyncio.wait_for(self._send(key, message, url), self.timeout)
+
+	async def _send(self, key, message, url):
+		idle = self._idle.setdefault(key, [])
+		while idle:
+			reader, writer = idle.pop()
+			if writer.is_closing() or reader.at_eof():
+				writer.close()
+				continue
+			try:
+				response = await self._exchange(key, reader, writer, message, url)
+			except (ConnectionError, asyncio.IncompleteReadError):
+				# server closed the idle connection, try the next one
+				continue
+			self.reused += 1
+			return response
+		reader, writer = await asyncio.open_connection(key[0], key[1], ssl=key[2] or None)
+		self.connections += 1
+		return await self._exchange(key, reader, writer, message, url)
+
+	async def _exchange(self, key, reader, writer, message, url):
+		try:
+			response, keepAlive = await self._receive(reader, writer, message, url)
+		except BaseException:
+			writer.close()
+			raise
+		if keepAlive:
+			self._idle[key].append((reader, writer))
+		else:
+			writer.close()
+		return response
+
+	async def _receive(self, reader, writer, message, url):
+		writer.write(message)
+		await writer.drain()
+		status = await reader.readuntil(b'\r\n')
+		version, status, reason = (status.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+		headers = {}
+		while True:
+			line = await reader.readuntil(b'\r\n')
+			if line == b'\r\n':
+				break
+			name, _, value = line.decode('latin-1').partition(':')
+			headers[name.strip().lower()] = value.strip()
+		status = int(status)
+		keepAlive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+		if status in (204, 304) or 100 <= status < 200:
+			body = b''
+		elif headers.get('transfer-encoding', '').lower() == 'chunked':
+			chunks = []
+			while True:
+				size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+				if size == 0:
+					# skip trailers
+					while await reader.readuntil(b'\r\n') != b'\r\n':
+						pass
+					break
+				chunks.append(await reader.readexactly(size))
+				await reader.readexactly(2)
+			body = b''.join(chunks)
+		elif 'content-length' in headers:
+			body = await reader.readexactly(int(headers['content-length']))
+		else:
+			body = await reader.read()
+			keepAlive = False
+		return Response(url, status, reason, headers, body), keepAlive
+
+	async def close(self):
+		""" Closes all idle connections. """
+		for connections in self._idle.values():
+			for reader, writer in connections:
+				writer.close()
+		self._idle.clear()
+
+
+class AsyncClient(object):
+	""" Base class for asyncio clients of :class:`Entity` models; every
+	client shares one :class:`ConnectionPool` for all its requests. Use
+	it as async context manager or call :meth:`close` to free the
+	connections.
+
+	:param api_base: API base url, defaults to `default_api_base` of the
+		model (`entity`)
+	:param pool: :class:`ConnectionPool` to share with other clients,
+		other keyword arguments are passed to a new pool otherwise.
+	"""
+	#: :class:`Entity` subclass the client creates
+	entity = None
+
+	def __init__(self, api_base=None, pool=None, **poolOptions):
+		self.api_base = api_base or self.entity.default_api_base
+		self.pool = pool or ConnectionPool(**poolOptions)
+
+	def url(self, name, params={}):
+		return buildUrl(self.api_base, name, params)
+
+	async def request(self, name, params={}):
+		response = await self.pool.request(self.url(name, params))
+		return response.content()
+
+	def lookup(self, id):
+		""" Returns the already loaded model instance for `id` (from the
+		identity map of the model) or `None`. """
+		return self.entity._lookup(id)
+
+	def create(self, jsonDict):
+		""" Creates a model instance from decoded API data; models with a
+		`fromValues` constructor (and identity map) are created with it.
+		Instances which were already loaded are updated but keep their
+		`api_base`. """
+		fromValues = getattr(self.entity, 'fromValues', None)
+		if fromValues is None:
+			entity = self.entity(values=jsonDict)
+			entity.api_base = self.api_base
+			return entity
+		identityMap = getattr(self.entity, 'identityMap', None)
+		id = jsonDict.get('id')
+		known = identityMap is not None and id is not None and identityMap.peek(id) is not None
+		entity = fromValues(jsonDict)
+		if not known:
+			entity.api_base = self.api_base
+		return entity
+
+	async def close(self):
+		await self.pool.close()
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.close()
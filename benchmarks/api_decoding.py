@@ -0,0 +1,54 @@
+# -*- coding: UTF-8 -*-
+""" Compares the generic :meth:`Entity.fromJsonDict` loop with the decoder
+    generated by :class:`pyopenmensa.wrapper.ModelMeta` for
+    :class:`pyopenmensa.api2.Canteen`.
+
+    Usage: python benchmarks/api_decoding.py [canteens]
+"""
+import sys
+import timeit
+import tracemalloc
+
+from pyopenmensa.api2 import Canteen
+from pyopenmensa.wrapper import Entity
+
+
+def canteens(count):
+    return [{'id': id, 'name': 'Mensa {0}'.format(id),
+             'address': 'Straße {0}, Berlin'.format(id),
+             'latitude': 52.0 + id / 10000.0, 'longitude': 13.0}
+            for id in range(count)]
+
+
+def generic(values):
+    canteen = Canteen()
+    for value in values:
+        Entity.fromJsonDict(canteen, value)
+
+
+def compiled(values):
+    canteen = Canteen()
+    for value in values:
+        canteen.fromJsonDict(value)
+
+
+def memory(values):
+    tracemalloc.start()
+    result = [Canteen(values=value) for value in values]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(result)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    values = canteens(count)
+    slow = min(timeit.repeat(lambda: generic(values), number=1, repeat=7))
+    fast = min(timeit.repeat(lambda: compiled(values), number=1, repeat=7))
+    print('{0} canteens: field loop {1:.1f}ms, compiled decoder {2:.1f}ms '
+          '({3:.2f}x), {4:.0f} bytes per canteen'.format(
+              count, slow * 1000, fast * 1000, slow / fast, memory(values)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: UTF-8 -*-
+""" Measures time and peak memory of decoding a large canteen listing:
+    decoding the body to str before json.loads (the former
+    :meth:`Entity.request`), parsing the UTF-8 bytes directly and parsing
+    them with orjson if it is installed.
+
+    Usage: python benchmarks/api_json_memory.py [canteens]
+"""
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+from pyopenmensa import wrapper
+from pyopenmensa.wrapper import decodeContent, setJsonBackend
+
+CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+def listing(count):
+    return json.dumps([{'id': id, 'name': 'Mensa Süd {0}'.format(id),
+                        'city': 'Berlin',
+                        'address': 'Hauptstraße {0}, 10115 Berlin'.format(id),
+                        'coordinates': [52.0 + id / 100000.0, 13.4]}
+                       for id in range(count)]).encode('utf-8')
+
+
+def decodeBeforeParsing(response):
+    return json.loads(response.read().decode('utf-8'))
+
+
+def parseBytes(response):
+    return decodeContent(CONTENT_TYPE, response.read())
+
+
+def measure(func, data):
+    response = io.BytesIO(data)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(response)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    # time without tracemalloc overhead
+    elapsed = min(elapsed, min(timing(func, data) for _ in range(3)))
+    return elapsed, peak
+
+
+def timing(func, data):
+    response = io.BytesIO(data)
+    start = time.perf_counter()
+    func(response)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    data = listing(count)
+    print('{0} canteens, {1:.1f} MiB JSON'.format(count, len(data) / 2 ** 20))
+    variants = [('decode + json.loads(str)', 'json', decodeBeforeParsing),
+                ('json.loads(bytes)', 'json', parseBytes)]
+    if 'orjson' in wrapper.jsonBackends:
+        variants.append(('orjson.loads(bytes)', 'orjson', parseBytes))
+    for name, backend, func in variants:
+        setJsonBackend(backend)
+        elapsed, peak = measure(func, data)
+        print('{0:>26}: {1:6.1f}ms, peak {2:6.1f} MiB'.format(
+            name, elapsed * 1000, peak / 2 ** 20))
+    setJsonBackend('json')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+""" Compares the tiered date parser behind
+    :func:`pyopenmensa.feed.extractDate` with the former single regex over
+    a corpus of date strings as found on canteen pages. The cache of
+    extractDate is bypassed.
+
+    Usage: python benchmarks/date_parsing.py [rounds]
+"""
+import re
+import sys
+import timeit
+
+from pyopenmensa import feed
+
+CORPUS = [
+    '2013-03-07', '2013-3-7', '13-03-07', '07.03.2013', '7.3.2013',
+    '07.03.13', ' 07.03.2013 ', '07. März 2013', '7 march 13',
+    'Montag, 07.03.2013', 'Speiseplan für Dienstag, den 08.03.2013',
+    'Mittwoch 09. März 2013 - Mensa am Park', 'Do, 10.3.13',
+    'Freitag, 11. Maerz 2013 (geändert)', 'Woche vom 2013-03-11 bis 2013-03-15',
+    'Tagesangebot\n12.03.2013\nAusgabe 11:30-14:00',
+    'Speiseplan Mensa Nord - gültig ab Montag, dem 18. März 2013 bis Freitag',
+    '2013-03-45', '45.03.2013', '07.13.2013', '07. Hans 2013', 'kein Datum',
+]
+
+legacy_format = re.compile(".*?" + feed.date_regex + ".*", re.UNICODE)
+
+
+def legacy(text):
+    match = legacy_format.search(text.lower())
+    if not match:
+        raise ValueError('unsupported date format')
+    if match.group('month'):
+        if not match.group('month') in feed.month_names:
+            raise ValueError('unknown month name')
+        year = int(match.group('year'))
+        return feed.datetime.date(year if year > 2000 else 2000 + year,
+                                  int(feed.month_names[match.group('month')]),
+                                  int(match.group('day')))
+    parts = list(map(int, '-'.join(reversed(
+        match.group('datestr').split('.'))).split('-')))
+    if parts[0] < 2000:
+        parts[0] += 2000
+    return feed.datetime.date(*parts)
+
+
+def outcome(parse, text):
+    try:
+        return parse(text)
+    except ValueError:
+        return ValueError
+
+
+def run(parse):
+    for text in CORPUS:
+        outcome(parse, text)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for text in CORPUS:
+        assert outcome(legacy, text) == outcome(feed._parseDate, text), text
+    print('{0} strings, identical results'.format(len(CORPUS)))
+    before = min(timeit.repeat(lambda: run(legacy), number=rounds, repeat=25))
+    after = min(timeit.repeat(lambda: run(feed._parseDate), number=rounds,
+                              repeat=25))
+    print('single regex: {0:.1f}ms, tiered: {1:.1f}ms ({2:.2f}x)'.format(
+        before * 1000, after * 1000, before / after))
+
+
+if __name__ == '__main__':
+    main()
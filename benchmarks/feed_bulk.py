@@ -0,0 +1,59 @@
+# -*- coding: UTF-8 -*-
+""" Compares a loop over :meth:`addMeal` with a single :meth:`addMeals`
+    call for :class:`pyopenmensa.feed.BaseBuilder` and
+    :class:`pyopenmensa.feed.LazyBuilder`.
+
+    Usage: python benchmarks/feed_bulk.py [meals]
+"""
+import datetime
+import sys
+import timeit
+
+from pyopenmensa.feed import BaseBuilder, LazyBuilder
+
+
+def base_rows(count):
+    start = datetime.date(2013, 1, 7)
+    return [(start + datetime.timedelta(days=i // 500), 'Essen {0}'.format(i % 5),
+             'Gericht {0}'.format(i), ['vegan'], {'student': 250, 'other': 400})
+            for i in range(count)]
+
+
+def lazy_rows(count):
+    return [('{0}.01.2013'.format(7 + i // 500), 'Essen {0}'.format(i % 5),
+             'Gericht {0} (1)'.format(i), None, '2,50 €')
+            for i in range(count)]
+
+
+def lazy_builder():
+    builder = LazyBuilder()
+    builder.setLegendData(legend={'1': 'Schwein'})
+    builder.setAdditionalCharges('student', {'other': 150})
+    return builder
+
+
+def single(factory, rows):
+    builder = factory()
+    for row in rows:
+        builder.addMeal(*row)
+
+
+def bulk(factory, rows):
+    factory().addMeals(rows)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for name, factory, rows in (('BaseBuilder', BaseBuilder, base_rows(count)),
+                                ('LazyBuilder', lazy_builder, lazy_rows(count))):
+        loop = min(timeit.repeat(lambda: single(factory, rows), number=1,
+                                 repeat=5))
+        batch = min(timeit.repeat(lambda: bulk(factory, rows), number=1,
+                                  repeat=5))
+        print('{0}: {1} meals, addMeal loop {2:.1f}ms, addMeals {3:.1f}ms '
+              '({4:.2f}x)'.format(name, count, loop * 1000, batch * 1000,
+                                  loop / batch))
+
+
+if __name__ == '__main__':
+    main()
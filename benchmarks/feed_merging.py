@@ -0,0 +1,76 @@
+# -*- coding: UTF-8 -*-
+""" Compares merging partial builders (menus, prices and closed days) by
+    replaying :meth:`addMeal` with :meth:`BaseBuilder.merge`.
+
+    Usage: python benchmarks/feed_merging.py [days] [categories] [repeat]
+"""
+import datetime
+import sys
+import time
+
+from pyopenmensa.feed import BaseBuilder
+
+NOTES = ['vegetarisch', 'Schwein', 'Rind', 'mit Farbstoff', 'glutenfrei']
+
+
+def sources(days, categories):
+    menus, prices, closed = BaseBuilder(), BaseBuilder(), BaseBuilder()
+    start = datetime.date(2013, 1, 7)
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        if offset % 7 == 6:
+            closed.setDayClosed(day)
+            continue
+        for index in range(categories):
+            category = 'Essen {0}'.format(index)
+            for meal in range(4):
+                name = 'Gericht {0}/{1}/{2}'.format(offset, index, meal)
+                menus.addMeal(day, category, name,
+                              NOTES[meal:meal + index % 3])
+                prices.addMeal(day, category, name, None,
+                               {'student': 150 + 10 * meal,
+                                'other': 380 + 10 * meal})
+    return menus, prices, closed
+
+
+def replay(builders):
+    result = BaseBuilder()
+    for builder in builders:
+        for day, data in builder._days.items():
+            if data is False:
+                result.setDayClosed(day)
+                continue
+            for category, meals in data.items():
+                for name, notes, prices in meals:
+                    result.addMeal(day, category, name, notes, prices)
+    return result
+
+
+def measure(func, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.time() - start) / repeat
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    categories = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    builders = sources(days, categories)
+    meals = sum(len(meals) for builder in builders
+                for data in builder._days.values() if data
+                for meals in data.values())
+    print('{0} days x {1} categories, {2} meals'.format(days, categories,
+                                                       meals))
+    _, replayed = measure(lambda: replay(builders), repeat)
+    print('replay addMeal: {0:.1f}ms'.format(replayed * 1000))
+    for strategy in BaseBuilder.merge_strategies:
+        _, merged = measure(lambda: BaseBuilder().merge(
+            *builders, strategy=strategy), repeat)
+        print('merge {0}: {1:.1f}ms ({2:.1f}x)'.format(
+            strategy, merged * 1000, replayed / merged))
+
+
+if __name__ == '__main__':
+    main()
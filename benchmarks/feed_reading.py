@@ -0,0 +1,65 @@
+# -*- coding: UTF-8 -*-
+""" Compares :meth:`BaseBuilder.fromXMLFeed` with parsing the same feed
+    into a :mod:`xml.dom.minidom` document, time and peak memory.
+
+    Usage: python benchmarks/feed_reading.py [days]
+"""
+import datetime
+import sys
+import time
+import tracemalloc
+from xml.dom import minidom
+
+from pyopenmensa.feed import LazyBuilder
+
+CATEGORIES = ['Essen {0}'.format(i) for i in range(1, 9)] + ['Beilagen']
+NOTES = ['vegetarisch', 'Schwein', 'Rind', 'mit Farbstoff', 'glutenfrei']
+
+
+def feed(days):
+    builder = LazyBuilder()
+    builder.name = 'Mensa'
+    builder.define(name='full', priority=0, url='http://example.org/full',
+                   source=None, dayOfWeek='*', dayOfMonth='*', hour='8',
+                   minute='0', retry=None)
+    start = datetime.date(2013, 1, 7)
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        for index, category in enumerate(CATEGORIES):
+            for meal in range(6):
+                builder.addMeal(day, category,
+                                'Gericht {0}/{1}/{2}'.format(offset, index,
+                                                            meal),
+                                NOTES[meal % 3:meal % 3 + index % 4],
+                                {'student': 150 + 10 * meal,
+                                 'employee': 280 + 10 * meal,
+                                 'other': 380 + 10 * meal})
+    return builder.toXMLFeed().encode('utf-8')
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.time()
+    result = func()
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    data = feed(days)
+    print('feed: {0} days, {1:.1f} MiB'.format(days, len(data) / 2.0 ** 20))
+    builders = [('minidom', minidom.parseString),
+                ('fromXMLFeed', LazyBuilder.fromXMLFeed),
+                ('fromXMLFeed compact',
+                 lambda data: LazyBuilder.fromXMLFeed(data, compact=True))]
+    for name, build in builders:
+        _, elapsed, peak = measure(lambda: build(data))
+        print('{0}: {1:.0f}ms, peak {2:.1f} MiB'.format(
+            name, elapsed * 1000, peak / 2.0 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: UTF-8 -*-
+""" Compares serial :meth:`toXMLFeed` calls with
+    :func:`pyopenmensa.feed.renderFeeds` in thread and process mode.
+
+    Usage: python benchmarks/feed_rendering.py [canteens] [days] [workers]
+"""
+import datetime
+import sys
+import time
+
+from pyopenmensa.feed import LazyBuilder, renderFeeds
+
+CATEGORIES = ['Essen {0}'.format(i) for i in range(1, 6)] + ['Beilagen']
+NOTES = ['vegetarisch', 'Schwein', 'Rind', 'mit Farbstoff', 'glutenfrei']
+
+
+def canteen(number, days):
+    builder = LazyBuilder()
+    builder.name = 'Mensa {0}'.format(number)
+    start = datetime.date(2013, 1, 7)
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        for index, category in enumerate(CATEGORIES):
+            for meal in range(3):
+                builder.addMeal(day, category,
+                                'Gericht {0}/{1}/{2}'.format(offset, index,
+                                                            meal),
+                                NOTES[meal:meal + index % 3],
+                                {'student': 150 + 10 * meal,
+                                 'other': 380 + 10 * meal})
+    return builder
+
+
+def measure(func):
+    start = time.time()
+    result = func()
+    return result, time.time() - start
+
+
+def main():
+    canteens = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 14
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    builders = [canteen(number, days) for number in range(canteens)]
+    serial, serial_time = measure(
+        lambda: [builder.toXMLFeed() for builder in builders])
+    print('serial: {0} canteens, {1:.0f}ms'.format(canteens,
+                                                    serial_time * 1000))
+    for mode in ('thread', 'process'):
+        results, elapsed = measure(
+            lambda: renderFeeds(builders, workers=workers, mode=mode))
+        assert [result.xml for result in results] == serial
+        slowest = max(result.seconds for result in results)
+        print('{0}: {1:.0f}ms ({2:.2f}x), slowest canteen {3:.1f}ms'.format(
+            mode, elapsed * 1000, serial_time / elapsed, slowest * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: UTF-8 -*-
+""" Compares saving and loading builders as pickle, xml feed and binary
+    snapshot (:meth:`BaseBuilder.dump`), size and time; also loading a
+    single day of a snapshot file.
+
+    Usage: python benchmarks/feed_snapshot.py [days] [repeat]
+"""
+import datetime
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+from pyopenmensa.feed import LazyBuilder
+
+CATEGORIES = ['Essen {0}'.format(i) for i in range(1, 9)] + ['Beilagen']
+NOTES = ['vegetarisch', 'Schwein', 'Rind', 'mit Farbstoff', 'glutenfrei']
+
+
+def canteen(days):
+    builder = LazyBuilder()
+    builder.name = 'Mensa'
+    start = datetime.date(2013, 1, 7)
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        for index, category in enumerate(CATEGORIES):
+            for meal in range(6):
+                builder.addMeal(day, category,
+                                'Gericht {0}/{1}'.format(index, meal),
+                                NOTES[meal % 3:meal % 3 + index % 4],
+                                {'student': 150 + 10 * meal,
+                                 'employee': 280 + 10 * meal,
+                                 'other': 380 + 10 * meal})
+    return builder
+
+
+def measure(func, repeat=5):
+    """ Returns the result and the best time of `repeat` calls. """
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    builder = canteen(days)
+    path = os.path.join(tempfile.mkdtemp(), 'canteen')
+
+    def dump():
+        with open(path, 'wb') as stream:
+            builder.dump(stream)
+
+    def load(dates=None):
+        with open(path, 'rb') as stream:
+            return LazyBuilder.load(stream, dates=dates)
+
+    formats = [
+        ('pickle', lambda: pickle.dumps(builder._days, 2), pickle.loads),
+        ('xml', builder.toXMLFeed,
+         lambda data: LazyBuilder.fromXMLFeed(data.encode('utf-8'))),
+    ]
+    for name, save, restore in formats:
+        data, saved = measure(save, repeat)
+        _, restored = measure(lambda: restore(data), repeat)
+        print('{0}: {1:.0f} KiB, save {2:.0f}ms, load {3:.0f}ms'.format(
+            name, len(data) / 1024.0, saved * 1000, restored * 1000))
+    _, saved = measure(dump, repeat)
+    loaded, restored = measure(load, repeat)
+    assert loaded.toXMLFeed() == builder.toXMLFeed()
+    print('snapshot: {0:.0f} KiB, save {1:.0f}ms, load {2:.0f}ms'.format(
+        os.path.getsize(path) / 1024.0, saved * 1000, restored * 1000))
+    day = datetime.date(2013, 1, 7) + datetime.timedelta(days=days // 2)
+    _, single = measure(lambda: load([day]), repeat)
+    print('snapshot single day: {0:.2f}ms'.format(single * 1000))
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
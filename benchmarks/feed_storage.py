@@ -0,0 +1,58 @@
+# -*- coding: UTF-8 -*-
+""" Compares the memory usage of the default and the compact meal storage
+    of :class:`pyopenmensa.feed.BaseBuilder`.
+
+    Usage: python benchmarks/feed_storage.py [canteens] [days]
+"""
+import datetime
+import sys
+import tracemalloc
+
+from pyopenmensa.feed import BaseBuilder
+
+CATEGORIES = ['Essen {0}'.format(i) for i in range(1, 6)] + ['Beilagen']
+NOTES = ['vegetarisch', 'Schwein', 'Rind', 'mit Farbstoff', 'glutenfrei']
+
+
+def fill(builder, days):
+    start = datetime.date(2013, 1, 7)
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        for number, category in enumerate(CATEGORIES):
+            for meal in range(3):
+                prices = {}
+                if number:
+                    prices = {'student': 150 + 10 * meal,
+                              'employee': 300 + 10 * meal,
+                              'other': 380 + 10 * meal}
+                builder.addMeal(day, category,
+                                'Gericht {0}/{1}/{2}'.format(offset, number,
+                                                            meal),
+                                NOTES[meal:meal + number % 3], prices)
+
+
+def measure(canteens, days, compact):
+    tracemalloc.start()
+    builders = []
+    for _ in range(canteens):
+        builder = BaseBuilder(compact=compact)
+        fill(builder, days)
+        builders.append(builder)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main():
+    canteens = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    default = measure(canteens, days, False)
+    compact = measure(canteens, days, True)
+    print('{0} canteens x {1} days'.format(canteens, days))
+    print('default: {0:8.1f} MiB'.format(default / 2 ** 20))
+    print('compact: {0:8.1f} MiB ({1:.0%})'.format(compact / 2 ** 20,
+                                                  compact / default))
+
+
+if __name__ == '__main__':
+    main()
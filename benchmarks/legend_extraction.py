@@ -0,0 +1,43 @@
+# -*- coding: UTF-8 -*-
+""" Compares :func:`pyopenmensa.feed.extractNotes` with a prepared
+    :class:`pyopenmensa.feed.Legend` on a page of meal names.
+
+    Usage: python benchmarks/legend_extraction.py [meals]
+"""
+import random
+import sys
+import timeit
+
+from pyopenmensa.feed import Legend, extractNotes
+
+LEGEND = dict([(str(number), 'Zusatzstoff {0}'.format(number))
+               for number in range(1, 30)] +
+              [(letter, 'Allergen {0}'.format(letter))
+               for letter in 'abcdefghijklmn'])
+REFERENCES = ['(1)', '(2,3)', '(a,b,c)', '(1,a)', '(12,13,f)', '(4,5,6,g,h)']
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(42)
+    names = ['Gericht {0} {1} mit Beilage {2}'.format(
+        meal, rng.choice(REFERENCES), rng.choice(REFERENCES))
+        for meal in range(count)]
+    legend = Legend(LEGEND)
+    for name in names:
+        assert legend.extract(name, []) == extractNotes(name, [],
+                                                        legend=LEGEND)
+    function = min(timeit.repeat(
+        lambda: [extractNotes(name, [], legend=LEGEND) for name in names],
+        number=1, repeat=15))
+    prepared = min(timeit.repeat(
+        lambda: [legend.extract(name, []) for name in names],
+        number=1, repeat=15))
+    print('{0} meals, {1} legend entries: extractNotes {2:.1f}ms, '
+          'Legend.extract {3:.1f}ms ({4:.2f}x)'.format(
+              count, len(LEGEND), function * 1000, prepared * 1000,
+              function / prepared))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# -*- coding: UTF-8 -*-
+""" Compares converting a price table cell by cell via
+    :func:`pyopenmensa.feed.convertPrice` with one
+    :func:`pyopenmensa.feed.convertPrices` call per column, for columns
+    with repeated and with distinct price strings.
+
+    Usage: python benchmarks/price_conversion.py [cells]
+"""
+import random
+import sys
+import timeit
+
+from pyopenmensa.feed import convertPrice, convertPrices, numpy
+
+CELLS = ['{0},{1:02} €'.format(euro, cent) for euro in range(1, 6)
+         for cent in range(0, 100, 10)] + ['-', '3€', '2.50', 2.5, 250]
+
+
+def compare(name, column):
+    assert convertPrices(column) == [convertPrice(cell) for cell in column]
+    single = min(timeit.repeat(lambda: [convertPrice(cell) for cell in column],
+                               number=1, repeat=15))
+    batch = min(timeit.repeat(lambda: convertPrices(column), number=1,
+                              repeat=15))
+    print('{0} cells ({1}): convertPrice loop {2:.1f}ms, convertPrices '
+          '{3:.1f}ms ({4:.1f}x)'.format(len(column), name, single * 1000,
+                                        batch * 1000, single / batch))
+    if numpy is not None:
+        masked = min(timeit.repeat(lambda: convertPrices(column, masked=True),
+                                   number=1, repeat=15))
+        print('convertPrices(masked=True) {0:.1f}ms'.format(masked * 1000))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(42)
+    compare('repeated', [rng.choice(CELLS) for _ in range(count)])
+    compare('distinct', ['{0},{1:02} €'.format(rng.randrange(1, 10 ** 6),
+                                               rng.randrange(100))
+                         for _ in range(count)])
+
+
+if __name__ == '__main__':
+    main()
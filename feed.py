@@ -1,24 +1,148 @@
 # -*- coding: UTF-8 -*-
-from collections import namedtuple
+from array import array
+from collections import deque, namedtuple
 import datetime
+import hashlib
+import io
+from itertools import chain, islice
+import mmap
+from multiprocessing import cpu_count
+from operator import itemgetter
 import re
+import struct
+import threading
+import time
 from xml.dom.minidom import Document
+from xml.etree.ElementTree import iterparse
 
 try:
     from collections import OrderedDict
 except ImportError:  # support python 2.6
     OrderedDict = dict
 
+try:
+    from concurrent import futures
+except ImportError:  # python 2 without the futures backport
+    futures = None
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, see convertPrices
+    numpy = None
+
+
+# Bounded caches for the parse helpers
+# ------------------------------------
+
+#: Statistics of the caches inside this module, like
+#: :func:`functools.lru_cache` reports them. `maxsize` is `None` for
+#: unbounded caches.
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache(object):
+    """ Thread-safe mapping which keeps at most `maxsize` entries and drops
+        the least recently used entries first.
+
+        :param int maxsize: Number of entries to keep, `None` means unbounded,
+            `0` disables the cache."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, default=None):
+        """ Returns the cached value for `key` (and marks it as recently used)
+            or `default`. """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            if hasattr(self._data, 'move_to_end'):
+                self._data.move_to_end(key)
+            else:  # python 2
+                del self._data[key]
+                self._data[key] = value
+            self._hits += 1
+            return value
+
+    def set(self, key, value):
+        """ Stores `value` for `key` and drops old entries if needed. """
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            self._shrink()
+
+    def resize(self, maxsize):
+        """ Change the number of entries to keep. """
+        with self._lock:
+            self.maxsize = maxsize
+            self._shrink()
+
+    def clear(self):
+        """ Drop all entries and reset the statistics. """
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self):
+        """ :rtype: :class:`CacheInfo` """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize,
+                             len(self._data))
+
+    def _shrink(self):
+        if self.maxsize is None:
+            return
+        while len(self._data) > self.maxsize:
+            del self._data[next(iter(self._data))]
+
+
+#: Registry of the regexes compiled by :func:`compilePattern`; every miss
+#: is one compilation, see ``pattern_cache.info().misses``
+pattern_cache = LRUCache(128)
+
+
+def compilePattern(regex, flags=re.UNICODE):
+    """ Returns the compiled version of a regex str. The patterns are
+        compiled only once and are kept in :data:`pattern_cache`, independent
+        of the small internal cache of the :mod:`re` module. Already
+        compiled patterns are returned unchanged.
+
+        :param regex: regex as :obj:`str` or compiled pattern
+        :param int flags: flags to compile a str with
+        :rtype: compiled regex"""
+    if not isinstance(regex, str):
+        return regex
+    key = (regex, flags)
+    pattern = pattern_cache.get(key)
+    if pattern is None:
+        pattern = re.compile(regex, flags)
+        pattern_cache.set(key, pattern)
+    return pattern
+
 
 # Helpers to extract dates from strings
 # -------------------------------------
 
-date_format = re.compile(".*?(?P<datestr>(" +
-                         "\d{2}(\d{2})?-[01]?\d-[0-3]?\d|" +
-                         "[0-3]?\d\.[01]?\d\.\d{2}(\d{2})?|" +
-                         "(?P<day>[0-3]?\d)\.? ?(?P<month>\S+) ?" +
-                         "(?P<year>\d{2}(\d{2})?))).*",
-                         re.UNICODE)
+date_regex = "(?P<datestr>(" + \
+             r"\d{2}(\d{2})?-[01]?\d-[0-3]?\d|" + \
+             r"[0-3]?\d\.[01]?\d\.\d{2}(\d{2})?|" + \
+             r"(?P<day>[0-3]?\d)\.? ?(?P<month>\S+) ?" + \
+             r"(?P<year>\d{2}(\d{2})?)))"
+#: Compiled regex used by :func:`extractDate` to search dates inside of
+#: strings
+date_pattern = re.compile(date_regex, re.UNICODE)
+# full string matching variant of date_pattern (for compatibility)
+date_format = re.compile(".*?" + date_regex + ".*", re.UNICODE)
 month_names = {
     'januar': '01',
     'january': '01',
@@ -44,15 +168,71 @@ month_names = {
 }
 
 
+#: Cache of :func:`extractDate` for the recently converted strings; use
+#: ``date_cache.resize(n)`` to configure it and ``date_cache.info()`` for
+#: its statistics
+date_cache = LRUCache(256)
+
+
 def extractDate(text):
-    """ Tries to extract a date from a given :obj:`str`.
+    """ Tries to extract a date from a given :obj:`str`. The results are
+        cached in :data:`date_cache`.
 
         :param str text: Input date. A :obj:`datetime.date` object is passed
              thought without modification.
         :rtype: :obj:`datetime.date`"""
     if type(text) is datetime.date:
         return text
-    match = date_format.search(text.lower())
+    date = date_cache.get(text)
+    if date is None:
+        date = _parseDate(text)
+        date_cache.set(text, date)
+    return date
+
+
+_digits = frozenset('0123456789')
+
+
+def _splitDate(text, separator, yearFirst):
+    """ Fast path of :func:`extractDate` for plain `YYYY-MM-DD` and
+        `DD.MM.YYYY` strings (and their short variants). It accepts only
+        strings for which :data:`date_pattern` would find the complete
+        string, `None` is returned for all other strings. """
+    parts = text.split(separator)
+    if len(parts) != 3:
+        return None
+    if yearFirst:
+        year, month, day = parts
+    else:
+        day, month, year = parts
+    if len(year) not in (2, 4) or not 0 < len(month) < 3 \
+            or not 0 < len(day) < 3:
+        return None
+    if len(month) == 2 and month[0] not in '01' \
+            or len(day) == 2 and day[0] not in '0123':
+        return None
+    if not _digits.issuperset(year + month + day):
+        return None
+    year = int(year)
+    if year < 2000:
+        year += 2000
+    return datetime.date(year, int(month), int(day))
+
+
+def _parseDate(text):
+    # cheap fast paths for the common formats without regex:
+    stripped = text.strip()
+    if '-' in stripped:
+        date = _splitDate(stripped, '-', True)
+    else:
+        date = _splitDate(stripped, '.', False)
+    if date is not None:
+        return date
+    return _searchDate(text)
+
+
+def _searchDate(text):
+    match = date_pattern.search(text.lower())
     if not match:
         raise ValueError('unsupported date format: {0}'.format(text.lower()))
     # convert DD.MM.YYYY into YYYY-MM-DD
@@ -111,6 +291,9 @@ default_price_regex = re.compile(r'(^|[^\d,.])(?P<euro>\d+)[,.]' +
                                  re.UNICODE)
 short_price_regex = re.compile(r'[^\d]*(?P<euro>\d+)\s*€[^\d]*', re.UNICODE)
 none_price_regex = re.compile(r'^\s*-\s*$', re.UNICODE)
+#: Opt-in cache of :func:`convertPrice` for price strings, keyed by the
+#: string and the used regexes; enable it with ``price_cache.resize(n)``
+price_cache = LRUCache(0)
 
 
 def convertPrice(variant, regex=None, short_regex=None, none_regex=none_price_regex):
@@ -119,30 +302,104 @@ def convertPrice(variant, regex=None, short_regex=None, none_regex=none_price_re
 
         :param variant: Price
         :param re.compile regex: Regex to convert str into price. The re should
-             contain two named groups `euro` and `cent`
+             contain two named groups `euro` and `cent`. Regex strings are
+             compiled via :func:`compilePattern` (also for the other
+             regexes).
         :param re.compile short_regex: Short regex version (no cent part)
              group `euro` should contain a valid integer.
         :param re.compile none_regex: Regex to detect that no value is provided
              if the input data is str, the normal regex do not match and this
              regex matches `None` is returned.
-        :rtype: int/None'''
+        :rtype: int/None
+
+        Converted strings are stored in :data:`price_cache` if it is
+        enabled.'''
     if isinstance(variant, int) and not isinstance(variant, bool):
         return variant
     elif isinstance(variant, float):
         return round(variant * 100)
     elif isinstance(variant, str):
-        match = (regex or default_price_regex).search(variant) \
-            or (short_regex or short_price_regex).match(variant)
-        if not match:
-            if none_regex and none_regex.match(variant):
-                return None
-            raise ValueError('Could not extract price: {0}'.format(variant))
-        return int(match.group('euro')) * 100 + \
-            int(match.groupdict().get('cent', '').ljust(2, '0'))
+        regex = compilePattern(regex) if regex else default_price_regex
+        short_regex = compilePattern(short_regex) if short_regex \
+            else short_price_regex
+        if isinstance(none_regex, str):
+            none_regex = compilePattern(none_regex)
+        if price_cache.maxsize == 0:
+            return _parsePrice(variant, regex, short_regex, none_regex)
+        # hashing compiled regexes is expensive, use their identity; the
+        # cached entry references them so that their ids stay unique
+        key = (variant, id(regex), id(short_regex), id(none_regex))
+        entry = price_cache.get(key)
+        if entry is None:
+            entry = (_parsePrice(variant, regex, short_regex, none_regex),
+                     regex, short_regex, none_regex)
+            price_cache.set(key, entry)
+        return entry[0]
     else:
         raise TypeError('Unknown price type: {0!r}'.format(variant))
 
 
+def _parsePrice(variant, regex, short_regex, none_regex):
+    match = regex.search(variant) or short_regex.match(variant)
+    if not match:
+        if none_regex and none_regex.match(variant):
+            return None
+        raise ValueError('Could not extract price: {0}'.format(variant))
+    return int(match.group('euro')) * 100 + \
+        int(match.groupdict().get('cent', '').ljust(2, '0'))
+
+
+def convertPrices(values, regex=None, short_regex=None,
+                  none_regex=none_price_regex, masked=False):
+    ''' Converts a whole column of prices like :func:`convertPrice`. Every
+        distinct string is parsed once: the regex is mapped over all of them
+        at once and the matched digits are converted together instead of a
+        :func:`convertPrice` call per cell.
+
+        :param values: iterable of prices
+        :param regex: see :func:`convertPrice`
+        :param short_regex: see :func:`convertPrice`
+        :param none_regex: see :func:`convertPrice`
+        :param bool masked: return the cents as :class:`numpy.ma.MaskedArray`
+             (int64) in which the `None` prices are masked. Requires NumPy.
+        :rtype: list of int/None or :class:`numpy.ma.MaskedArray`'''
+    if masked and numpy is None:
+        raise ImportError('convertPrices(masked=True) requires numpy')
+    regex = compilePattern(regex or default_price_regex)
+    short_regex = compilePattern(short_regex or short_price_regex)
+    none_regex = compilePattern(none_regex)
+    values = list(values)
+    strings = list(OrderedDict.fromkeys(
+        [value for value in values if type(value) is str]))
+    converted = dict(zip(strings, _parsePrices(strings, regex, short_regex,
+                                               none_regex)))
+    try:
+        # only strings are keys, other cells are converted one by one
+        prices = list(map(converted.__getitem__, values))
+    except KeyError:
+        prices = [converted[value] if type(value) is str else
+                  convertPrice(value, regex, short_regex, none_regex)
+                  for value in values]
+    if not masked:
+        return prices
+    return numpy.ma.masked_array(
+        [0 if price is None else price for price in prices],
+        mask=[price is None for price in prices], dtype=numpy.int64)
+
+
+def _parsePrices(strings, regex, short_regex, none_regex):
+    ''' :func:`_parsePrice` for all `strings`; the strings which `regex`
+        does not match take the single string path. '''
+    if 'cent' not in regex.groupindex:
+        return [_parsePrice(string, regex, short_regex, none_regex)
+                for string in strings]
+    groups = [match and match.group('euro', 'cent')
+              for match in map(regex.search, strings)]
+    return [int(group[0]) * 100 + int((group[1] or '').ljust(2, '0')) if group
+            else _parsePrice(string, regex, short_regex, none_regex)
+            for string, group in zip(strings, groups)]
+
+
 def buildPrices(data, roles=None, regex=default_price_regex,
                 default=None, additional={}):
     ''' Create a dictionary with price information. Multiple ways are
@@ -184,11 +441,11 @@ def buildPrices(data, roles=None, regex=default_price_regex,
 # -------------------------------------
 
 #: Default regex str for :func:`buildLegend`
-default_legend_regex = '(?P<name>(\d|[a-z])+)\)\s*' + \
-                       '(?P<value>\w+((\s+\w+)*[^0-9)]))'
+default_legend_regex = r'(?P<name>(\d|[a-z])+)\)\s*' + \
+                       r'(?P<value>\w+((\s+\w+)*[^0-9)]))'
 #: Default compiled regex for :func:`extractNotes`
-default_extra_regex = re.compile('\((?P<extra>[0-9a-zA-Z]{1,2}'
-                                 '(?:,[0-9a-zA-Z]{1,2})*)\)', re.UNICODE)
+default_extra_regex = re.compile(r'\((?P<extra>[0-9a-zA-Z]{1,2}'
+                                 r'(?:,[0-9a-zA-Z]{1,2})*)\)', re.UNICODE)
 
 
 def buildLegend(legend=None, text=None, regex=None, key=lambda v: v):
@@ -198,16 +455,17 @@ def buildLegend(legend=None, text=None, regex=None, key=lambda v: v):
         :param dict legend: Initial legend data
         :param str text: Text from which should legend information extracted.
             None means do no extraction.
-        :param str regex: Regex to find legend part inside the given text. The
-            regex should have a named group `name` (key) and a named group
-            `value` (value).
+        :param regex: Regex (str or compiled) to find legend part inside the
+            given text. The regex should have a named group `name` (key) and
+            a named group `value` (value). It is compiled via
+            :func:`compilePattern`.
         :param callable key: function to map the key to a legend key
         :rtype: dict'''
     if legend is None:
         legend = {}
     if text is not None:
-        for match in re.finditer(regex or default_legend_regex,
-                                 text, re.UNICODE):
+        for match in compilePattern(regex or
+                                    default_legend_regex).finditer(text):
             legend[key(match.group('name'))] = match.group('value').strip()
     return legend
 
@@ -224,14 +482,16 @@ def extractNotes(name, notes, legend=None, regex=None, key=lambda v: v):
         :param re.compile regex: The regex to find legend references in the
             meal name. The regex must have exactly one group which identifies
             the key in the legend data. If you pass None the
-            :py:data:`default_extra_regex` is used. Only compiled regex are
-            supported.
+            :py:data:`default_extra_regex` is used. Strings are compiled via
+            :func:`compilePattern`.
         :param callable key: function to map the key to a legend key
         :rtype: tuple with name and notes'''
     if legend is None:
         return name, notes
     if regex is None:
         regex = default_extra_regex
+    else:
+        regex = compilePattern(regex)
     # extract note
     for note in list(','.join(regex.findall(name)).split(',')):
         if not note:
@@ -247,6 +507,147 @@ def extractNotes(name, notes, legend=None, regex=None, key=lambda v: v):
     return name, notes
 
 
+#: marks keys without value in the legend data
+_missing = object()
+
+
+class Legend(object):
+    ''' Prepared legend for repeated note extraction. It behaves like
+        :func:`extractNotes` but remembers the resolved notes of every seen
+        reference combination (like `(1,a) ... (2)`), so key function,
+        legend lookups and duplicate checks run once per combination.
+
+        :param dict legend: The legend data; it may be changed or extended
+            later, remembered combinations are checked against it.
+        :param re.compile regex: see :func:`extractNotes`
+        :param callable key: see :func:`extractNotes`'''
+    #: number of remembered reference combinations before they are dropped
+    maxReferences = 4096
+
+    def __init__(self, legend, regex=None, key=lambda v: v):
+        self.legend = legend
+        self.regex = compilePattern(regex or default_extra_regex)
+        self.key = key
+        self._references = {}
+
+    def extract(self, name, notes):
+        ''' Same as :func:`extractNotes` with the legend data of this
+            object.
+
+            :param str name: The meal name
+            :param list notes: The initial list of notes, found notes are
+                appended
+            :rtype: tuple with name and notes'''
+        references = self.regex.findall(name)
+        if references:
+            references = tuple(references)
+            resolved = self._references.get(references)
+            if resolved is None or not self._isCurrent(resolved[2]):
+                if len(self._references) >= self.maxReferences:
+                    self._references.clear()
+                resolved = self._references[references] = \
+                    self._resolve(references)
+            found, unknown, _ = resolved
+            for note in unknown:
+                print('could not find extra note "{0}"'.format(note))
+            if notes:
+                seen = set(notes)
+                notes.extend([note for note in found if note not in seen])
+            else:
+                notes.extend(found)
+            name = self.regex.sub('', name)
+        return name.replace('\xa0', ' ').replace('  ', ' ').strip(), notes
+
+    def _resolve(self, references):
+        ''' Looks up all references of a meal name once.
+
+            :rtype: tuple with the unique notes, the unknown keys and the
+                `(key, value)` pairs of all lookups (see :meth:`_isCurrent`)
+            '''
+        found = []
+        unknown = []
+        lookups = []
+        for note in ','.join(references).split(','):
+            if not note:
+                continue
+            note = self.key(note)
+            value = self.legend.get(note, _missing)
+            lookups.append((note, value))
+            if value is _missing:
+                unknown.append(note)
+            elif value not in found:
+                found.append(value)
+        return tuple(found), tuple(unknown), tuple(lookups)
+
+    def _isCurrent(self, lookups):
+        ''' Checks whether the legend still contains the looked up values,
+            i.e. whether a remembered resolution is still valid. '''
+        get = self.legend.get
+        for key, value in lookups:
+            if get(key, _missing) is not value:
+                return False
+        return True
+
+
+# Helpers for xml serialization
+# -----------------------------
+
+#: Indention per nesting level inside the generated xml feeds
+xml_indent = '  '
+xml_header = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+def _minidomEscapes(attribute):
+    """ Replacements which :mod:`xml.dom.minidom` of the running python
+        does for text content or (`attribute`) attribute values; they
+        differ between versions, e.g. quotes in text stay unescaped since
+        python 3.13. """
+    document = Document()
+    escapes = []
+    for char in '&<>"\r\n\t':  # ampersands must be replaced first
+        if attribute:
+            element = document.createElement('e')
+            element.setAttribute('a', char)
+            escaped = element.toxml()[len('<e a="'):-len('"/>')]
+        else:
+            escaped = document.createTextNode(char).toxml()
+        if escaped != char:
+            escapes.append((char, escaped))
+    return tuple(escapes)
+
+
+_textEscapes = _minidomEscapes(False)
+_attributeEscapes = _minidomEscapes(True)
+
+
+def _escapeXMLText(data):
+    if not data:
+        return ''
+    for char, escaped in _textEscapes:
+        if char in data:
+            data = data.replace(char, escaped)
+    return data
+
+
+def _escapeXMLAttribute(data):
+    if not data:
+        return ''
+    for char, escaped in _attributeEscapes:
+        if char in data:
+            data = data.replace(char, escaped)
+    return data
+
+
+def _xmlAttributes(attributes):
+    return ''.join(' {0}="{1}"'.format(name, _escapeXMLAttribute(value))
+                   for name, value in attributes)
+
+
+def _xmlStringTag(indent, tag_name, value):
+    return '{0}<{1}>{2}</{1}>\n'.format(indent, tag_name,
+                                       _escapeXMLText(value))
+
+
 class Feed(namedtuple('FeedRecord', ['name', 'priority', 'url', 'source', 'dayOfWeek', 'dayOfMonth', 'hour', 'minute', 'retry'])):
     def toTag(self, output):
         ''' This methods returns all data of this feed as feed xml tag
@@ -280,21 +681,433 @@ class Feed(namedtuple('FeedRecord', ['name', 'priority', 'url', 'source', 'dayOf
             feed.appendChild(source)
         return feed
 
+    def toXMLString(self, indent=''):
+        ''' Same as :meth:`toTag` but returns the pretty printed feed tag
+        directly as string without building a XML Document.
+
+        :param str indent: Indention of the feed tag itself
+        :rtype: str
+        '''
+        inner = indent + xml_indent
+        schedule = [('dayOfMonth', self.dayOfMonth),
+                    ('dayOfWeek', self.dayOfWeek),
+                    ('hour', self.hour),
+                    ('minute', self.minute)]
+        if self.retry:
+            schedule.append(('retry', self.retry))
+        parts = [
+            indent, '<feed',
+            _xmlAttributes([('name', self.name),
+                            ('priority', str(self.priority))]), '>\n',
+            inner, '<schedule', _xmlAttributes(schedule), '/>\n',
+            _xmlStringTag(inner, 'url', self.url),
+        ]
+        if self.source:
+            parts.append(_xmlStringTag(inner, 'source', self.source))
+        parts.extend((indent, '</feed>\n'))
+        return ''.join(parts)
+
+
+# Helpers for binary snapshots
+# ----------------------------
+#
+# A snapshot (see BaseBuilder.dump) consists of a header, the metadata,
+# the day records, the string table and the day index. All integers are
+# little endian and all offsets relative to the start of the snapshot;
+# strings are stored once in the table and referenced by their position
+# (_noString marks None). A day record starts with the number of
+# categories (_closedDay for closed days), meals, notes and prices,
+# followed by columns: the names and meal counts of the categories; the
+# names, note counts and price role masks of the meals; the references of
+# all notes and all prices as 32 bit integers. The day index lists
+# ordinal, offset and size of every day record, sorted by date.
+
+_snapshotMagic = b'OMSB'
+#: newest snapshot format version which can be read
+snapshot_version = 1
+# magic, format version, flags, string count, string table offset,
+# day count, day index offset
+_snapshotHeader = struct.Struct('<4sHHIIII')
+_snapshotEntry = struct.Struct('<III')
+_snapshotDay = struct.Struct('<HIII')
+# name, kind and value of the priority, url, source and schedule
+_snapshotFeed = struct.Struct('<IBq7I')
+_snapshotCount = struct.Struct('<H')
+_snapshotCompact = 1
+_noString = 0xFFFFFFFF
+_closedDay = 0xFFFF
+# kinds of feed priorities; the value of string priorities is a reference
+_intPriority, _stringPriority, _noPriority = range(3)
+_metadataFields = ('_version', '_name', '_address', '_city', '_phone',
+                   '_email', '_availability')
+
+
+def _snapshotData(fp):
+    """ Returns the content of the file, mapped into memory if possible,
+        the position of the snapshot inside it and the original file
+        position (`None` for unseekable files). """
+    try:
+        start = fp.tell()
+    except (AttributeError, EnvironmentError):
+        start = None
+    try:
+        data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, EnvironmentError, ValueError):
+        # no real file (e.g. BytesIO) or empty file
+        return fp.read(), 0, start
+    return data, start or 0, start
+
+
+def _dayLayout(categories, meals, notes, prices):
+    """ Struct of the columns of a day record. """
+    return struct.Struct('<{0}I{0}I{1}I{1}H{1}H{2}I{3}i'.format(
+        categories, meals, notes, prices))
+
+
+class _SnapshotRefs(dict):
+    """ String table of a snapshot while writing it: maps every string to
+        its position in `table`, new strings are appended. """
+    def __init__(self):
+        super(_SnapshotRefs, self).__init__()
+        self.table = []
+
+    def __missing__(self, value):
+        index = self[value] = len(self.table)
+        self.table.append(value)
+        return index
+
+    def ref(self, value):
+        return _noString if value is None else self[value]
+
+
+class _SnapshotStrings(dict):
+    """ String table of a snapshot, which decodes every string on first
+        use. """
+    def __init__(self, reader):
+        super(_SnapshotStrings, self).__init__()
+        self.reader = reader
+
+    def __missing__(self, index):
+        reader = self.reader
+        if index >= reader.stringCount:
+            raise ValueError('Corrupt canteen snapshot')
+        start, end = struct.unpack_from(
+            '<II', reader.data, reader.base + reader.stringOffset + 4 * index)
+        position = reader.base + reader.stringData
+        value = self[index] = reader.data[position + start:
+                                          position + end].decode('utf-8')
+        return value
+
+
+class _SnapshotLayouts(dict):
+    """ Price roles per role mask of a snapshot and a function which creates
+        the prices dicts of `count` meals with this mask from their values.
+        The functions are generated with a dict display per role, which is
+        about twice as fast as `dict(zip(roles, values))`. """
+    def __init__(self, roles=()):
+        super(_SnapshotLayouts, self).__init__()
+        self.roles = roles
+
+    def __missing__(self, mask):
+        roles = [role for bit, role in enumerate(self.roles)
+                 if mask & 1 << bit]
+        namespace = dict(('role{0}'.format(index), role)
+                         for index, role in enumerate(roles))
+        values = ''.join('value{0}, '.format(index)
+                         for index in range(len(roles)))
+        if roles:
+            body = '    return [{{{0}}} for {1}in zip({2})]'.format(
+                ', '.join('role{0}: value{0}'.format(index)
+                          for index in range(len(roles))),
+                values, ', '.join(['values'] * len(roles)))
+        else:
+            body = '    return [{} for _ in range(count)]'
+        exec(compile('def build(values, count):\n'
+                     '    values = iter(values)\n' + body,
+                     '<prices {0}>'.format(mask), 'exec'), namespace)
+        layout = self[mask] = (roles, namespace['build'])
+        return layout
+
+
+class _SnapshotReader(object):
+    """ Decodes parts of a snapshot which starts at `base` inside a bytes
+        like object (e.g. a memory map). """
+
+    def __init__(self, data, base=0):
+        self.data = data
+        self.base = base
+        if len(data) - base < _snapshotHeader.size:
+            raise ValueError('Truncated canteen snapshot')
+        magic, version, self.flags, self.stringCount, self.stringOffset, \
+            self.dayCount, self.indexOffset = \
+            _snapshotHeader.unpack_from(data, base)
+        if magic != _snapshotMagic:
+            raise ValueError('No canteen snapshot')
+        if version > snapshot_version:
+            raise ValueError('Unsupported snapshot version {0}'.format(
+                version))
+        #: size of the whole snapshot
+        self.size = self.indexOffset + _snapshotEntry.size * self.dayCount
+        if len(data) - base < self.size:
+            raise ValueError('Truncated canteen snapshot')
+        self.stringData = self.stringOffset + 4 * (self.stringCount + 1)
+        self.strings = _SnapshotStrings(self)
+        self.layouts = None
+
+    def string(self, index):
+        return None if index == _noString else self.strings[index]
+
+    def entry(self, index):
+        """ Returns date ordinal, offset and size of the index-th day. """
+        return _snapshotEntry.unpack_from(
+            self.data,
+            self.base + self.indexOffset + _snapshotEntry.size * index)
+
+    def find(self, date):
+        """ Binary search of a day in the index, returns the entry or
+            `None`. """
+        ordinal = date.toordinal()
+        low, high = 0, self.dayCount
+        while low < high:
+            middle = (low + high) // 2
+            entry = self.entry(middle)
+            if entry[0] < ordinal:
+                low = middle + 1
+            elif entry[0] > ordinal:
+                high = middle
+            else:
+                return entry
+        return None
+
+    def metadata(self):
+        """ Returns the metadata values (see `_metadataFields`), the
+            location, the price roles and the feeds. """
+        offset = self.base + _snapshotHeader.size
+        count = len(_metadataFields) + 2
+        refs = struct.unpack_from('<{0}I'.format(count), self.data, offset)
+        offset += 4 * count
+        values = [self.string(ref) for ref in refs]
+        location = tuple(values[-2:]) if refs[-1] != _noString else None
+        roleCount, = _snapshotCount.unpack_from(self.data, offset)
+        offset += _snapshotCount.size
+        roles = tuple(self.string(ref) for ref in struct.unpack_from(
+            '<{0}I'.format(roleCount), self.data, offset))
+        self.layouts = _SnapshotLayouts(roles)
+        offset += 4 * roleCount
+        feedCount, = _snapshotCount.unpack_from(self.data, offset)
+        offset += _snapshotCount.size
+        feeds = []
+        for _ in range(feedCount):
+            name, kind, priority, url, source, dayOfWeek, dayOfMonth, hour, \
+                minute, retry = _snapshotFeed.unpack_from(self.data, offset)
+            offset += _snapshotFeed.size
+            if kind == _stringPriority:
+                priority = self.string(priority)
+            elif kind == _noPriority:
+                priority = None
+            feeds.append(Feed(self.string(name), priority, self.string(url),
+                              self.string(source), self.string(dayOfWeek),
+                              self.string(dayOfMonth), self.string(hour),
+                              self.string(minute), self.string(retry)))
+        return values[:-2], location, roles, feeds
+
+    def day(self, offset, buildMeal=None):
+        """ Decodes the day record at `offset`. Meals are stored as
+            `(name, notes, prices)` tuples, or created by `buildMeal` like
+            :meth:`BaseBuilder._buildMeal` does. The columns are decoded at
+            once, so only the meal tuples are created per meal. """
+        data = self.data
+        offset += self.base
+        categoryCount, mealCount, noteCount, priceCount = \
+            _snapshotDay.unpack_from(data, offset)
+        if categoryCount == _closedDay:
+            return False
+        values = _dayLayout(categoryCount, mealCount, noteCount,
+                            priceCount).unpack_from(
+            data, offset + _snapshotDay.size)
+        strings = self.strings
+        position = 2 * categoryCount
+        names = list(map(strings.__getitem__,
+                         values[position:position + mealCount]))
+        position += mealCount
+        noteCounts = values[position:position + mealCount]
+        masks = values[position + mealCount:position + 2 * mealCount]
+        position += 2 * mealCount
+        notes = list(map(strings.__getitem__,
+                         values[position:position + noteCount]))
+        priceValues = values[position + noteCount:]
+        # create all meals without a python loop per meal: every note list
+        # consumes its part of the shared notes iterator
+        notes = [iter(notes)] * mealCount
+        notes = map(list, map(islice, notes, noteCounts))
+        layouts = self.layouts
+        if masks and masks.count(masks[0]) == mealCount:
+            prices = layouts[masks[0]][1](priceValues, mealCount)
+        else:
+            mealRoles = [layouts[mask][0] for mask in masks]
+            priceValues = [iter(priceValues)] * mealCount
+            prices = map(dict, map(zip, mealRoles,
+                                   map(islice, priceValues,
+                                       map(len, mealRoles))))
+        meals = list(zip(names, notes, prices))
+        categories = OrderedDict()
+        position = 0
+        for name, count in zip(values[:categoryCount],
+                               values[categoryCount:2 * categoryCount]):
+            name = strings[name]
+            categoryMeals = meals[position:position + count]
+            position += count
+            if buildMeal is not None:
+                for index, meal in enumerate(categoryMeals):
+                    category, categoryMeals[index] = buildMeal(name, *meal)
+                if categoryMeals:
+                    name = category
+            categories[name] = categoryMeals
+        return categories
+
 
 # Base canteen with meal data
 # ---------------------------
 
 
+def _mealParameters(date, category, name, notes=None, prices=None):
+    return date, category, name, notes, prices
+
+
+class InvalidMealsError(ValueError):
+    """ Raised by :meth:`BaseBuilder.addMeals` if meals are invalid.
+
+        :ivar errors: list of `(index, exception)` tuples for every invalid
+            meal"""
+    def __init__(self, errors):
+        self.errors = errors
+        super(InvalidMealsError, self).__init__(
+            '{0} invalid meal(s): {1}'.format(len(errors), '; '.join(
+                '#{0}: {1}'.format(index, error) for index, error in errors)))
+
+
+def _mealTuple(key):
+    """ Converts a meal key of :meth:`BaseBuilder._mealKey` back into a
+        `(name, notes, prices)` tuple. """
+    return key[0], list(key[1]), dict(key[2])
+
+
+def _mealName(meal):
+    return meal.name if isinstance(meal, CompactMeal) else meal[0]
+
+
+def _compactPrice(price):
+    """ Whether `price` fits into the prices array of a :class:`CompactMeal`
+        without colliding with its marker for missing prices. """
+    return CompactMeal.missing < price < -CompactMeal.missing
+
+
+class CompactMeal(object):
+    """ Memory saving representation of a meal, used by builders created
+        with `compact=True`. The notes are stored as tuple, the prices as
+        32 bit integer array in the order of the builders price roles.
+        The object can be unpacked like the default `(name, notes, prices)`
+        meal tuple and compares equal to it. """
+    __slots__ = ('name', 'notes', 'prices', 'roles')
+    #: marks roles without price inside the prices array
+    missing = -2 ** 31
+
+    def __init__(self, name, notes, prices, roles):
+        self.name = name
+        self.notes = tuple(notes) if notes else ()
+        self.roles = roles
+        if prices:
+            try:
+                self.prices = array('i', [prices.get(role, self.missing)
+                                          for role in roles])
+            except OverflowError:
+                raise ValueError('Prices of compact meals must fit into '
+                                 '32 bit integers')
+        else:
+            self.prices = None
+
+    def __iter__(self):
+        prices = {}
+        if self.prices is not None:
+            for role, price in zip(self.roles, self.prices):
+                if price != self.missing:
+                    prices[role] = price
+        return iter((self.name, list(self.notes), prices))
+
+    def __eq__(self, other):
+        if not isinstance(other, (CompactMeal, tuple, list)):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'CompactMeal' + repr(tuple(self))
+
+
+#: Changes of one category between two builders, see
+#: :meth:`BaseBuilder.diff`. The meals are `(name, notes, prices)` tuples,
+#: `modifiedMeals` contains `(old, new)` pairs of meals with the same name.
+#: All lists are empty if only the order of the meals changed.
+CategoryDiff = namedtuple('CategoryDiff', ['name', 'addedMeals',
+                                           'removedMeals', 'modifiedMeals'])
+
+#: Changes of one date, see :meth:`BaseBuilder.diff`. `closed` is `True` if
+#: the canteen is closed now, `False` if it was closed before and is open
+#: now and `None` otherwise. `addedCategories` and `removedCategories` are
+#: lists of category names, `modifiedCategories` a list of
+#: :data:`CategoryDiff`.
+DayDiff = namedtuple('DayDiff', ['date', 'closed', 'addedCategories',
+                                 'removedCategories', 'modifiedCategories'])
+
+
+class FeedDiff(namedtuple('FeedDiff', ['addedDays', 'removedDays',
+                                       'modifiedDays'])):
+    """ Result of :meth:`BaseBuilder.diff`: the sorted lists of added and
+        removed dates and a :data:`DayDiff` for every modified date. """
+
+    def changedDates(self):
+        """ All added, removed and modified dates in sorted order, e.g. to
+            pass them to :meth:`BaseBuilder.toXMLFeed`.
+
+            :rtype: list of datetime.date"""
+        return sorted(self.addedDays + self.removedDays +
+                      [day.date for day in self.modifiedDays])
+
+
 class BaseBuilder(object):
     """ This class represents and stores all information
         about OpenMensa canteens. It helps writing new
         python parsers with helper and shortcuts methods.
         So the complete object can be converted to a valid
-        OpenMensa v2 xml feed string. """
+        OpenMensa v2 xml feed string.
+
+        :param version: Version of the parser
+        :param bool compact: store meals as :class:`CompactMeal` and share
+            equal category names and notes between meals. Reduces the memory
+            usage for builders which are kept alive, prices must fit into 32
+            bits.
+        :ivar cacheXML: False: keep the serialized xml of every day until the
+            day is changed via :meth:`addMeal`, :meth:`setDayClosed` or
+            :meth:`clearDay`. Useful for long-living builders which are
+            converted to feeds multiple times. """
     allowed_price_roles = ['pupil', 'student', 'employee', 'other']
 
-    def __init__(self, version=None):
+    def __init__(self, version=None, compact=False):
         self._days = {}
+        self._compact = compact
+        self._strings = {}
+        self._priceRoles = tuple(self.allowed_price_roles)
+        self.cacheXML = False
+        self._xmlCache = {}
+        self._xmlCacheHits = 0
+        self._xmlCacheMisses = 0
+        self._dayFingerprints = {}
+        self._daysFingerprint = None
         self._version = version
         self._name = None
         self._address = None
@@ -380,6 +1193,9 @@ class BaseBuilder(object):
             :raises ValueError: if the category name is empty
             :raises ValueError: if note list contains empty note
             :raises TypeError: if the price value is not an integer
+            :raises ValueError: if a price of a compact builder does not fit
+                into a 32 bit integer
+            :raises ValueError: if the canteen is closed on this date
 
             Additional the following data are also supported:
 
@@ -390,6 +1206,121 @@ class BaseBuilder(object):
                  the price in Euro Cents, The site of the OpenMensa project
                  offers more detailed information.
             :type prices: dict"""
+        self._checkMeal(category, name, notes, prices,
+                        self.allowed_price_roles)
+        date = self._handleDate(date)
+        if self._days.get(date) is False:
+            raise ValueError('The canteen is closed on {0}'.format(date))
+        category, meal = self._buildMeal(category, name, notes, prices)
+        # ensure we have an entry for this date
+        if date not in self._days:
+            self._days[date] = OrderedDict()
+        # ensure we have a category element for this category
+        if category not in self._days[date]:
+            self._days[date][category] = []
+        # add meal into category:
+        self._days[date][category].append(meal)
+        self._dayChanged(date)
+
+    def addMeals(self, meals):
+        """ Adds many meals at once. Every meal is given as tuple with the
+            parameters of :meth:`addMeal` (`(date, category, name)`,
+            optional followed by `notes` and `prices`) or as dictionary with
+            the parameter names as keys. :class:`LazyBuilder` converts the
+            meals like its :meth:`LazyBuilder.addMeal`, so `roles` is
+            supported there, too.
+
+            All meals are validated before any of them is added. The
+            validation does not stop at the first invalid meal: all
+            problems are reported together and the builder stays unchanged.
+
+            :param meals: iterable over the meals
+            :raises InvalidMealsError: if at least one meal is invalid"""
+        roles = frozenset(self.allowed_price_roles)
+        handleDate = self._handleDate
+        convert = self._mealConverter()
+        compact = self._compact
+        days = self._days
+        dates = {}
+        # valid meals are grouped by date and category and only merged into
+        # the stored days if all meals are valid:
+        added = {}
+        lastDate = lastCategory = categoryMeals = None
+        errors = []
+        for index, meal in enumerate(meals):
+            try:
+                if isinstance(meal, dict):
+                    date, category, name, notes, prices = \
+                        (convert or _mealParameters)(**meal)
+                elif convert is not None:
+                    date, category, name, notes, prices = convert(*meal)
+                elif len(meal) == 5:
+                    date, category, name, notes, prices = meal
+                else:
+                    date, category, name, notes, prices = \
+                        _mealParameters(*meal)
+                # cheap check for valid meals, the detailed check reports
+                # the actual problem:
+                if not name or not category or len(name) > 250 \
+                        or notes and not all(notes) \
+                        or prices and not roles.issuperset(prices):
+                    self._checkMeal(category, name, notes, prices, roles)
+                if prices:
+                    for price in prices.values():
+                        if not isinstance(price, int):
+                            raise TypeError('Unsupport price type - '
+                                            'expect integer')
+                        if compact and not _compactPrice(price):
+                            raise ValueError('Prices of compact builders '
+                                             'must fit into 32 bit integers')
+                if date in dates:
+                    date = dates[date]
+                else:
+                    date = dates.setdefault(date, handleDate(date))
+                if days.get(date) is False:
+                    raise ValueError('The canteen is closed on {0}'
+                                     .format(date))
+            except (ValueError, TypeError) as error:
+                errors.append((index, error))
+                continue
+            if compact:
+                category, meal = self._buildMeal(category, name, notes, prices)
+            else:
+                meal = (name, notes or [], {} if prices is None else prices)
+            if date != lastDate or category != lastCategory:
+                categories = added.get(date)
+                if categories is None:
+                    categories = added[date] = OrderedDict()
+                categoryMeals = categories.get(category)
+                if categoryMeals is None:
+                    categoryMeals = categories[category] = []
+                lastDate, lastCategory = date, category
+            categoryMeals.append(meal)
+        if errors:
+            raise InvalidMealsError(errors)
+        for date, categories in added.items():
+            day = days.get(date)
+            if day is None:
+                days[date] = categories
+            else:
+                for category, categoryMeals in categories.items():
+                    if category in day:
+                        day[category].extend(categoryMeals)
+                    else:
+                        day[category] = categoryMeals
+            self._dayChanged(date)
+
+    def _mealConverter(self):
+        """ Internal method called once by :meth:`addMeals`. Subclasses
+            return a callable which turns the parameters of a single meal
+            into a tuple with date, category, name, notes and prices for
+            :meth:`addMeal`. `None` means the meals need no conversion. """
+        return None
+
+    def _checkMeal(self, category, name, notes, prices, roles):
+        """ Internal method to validate meal data as described at
+            :meth:`addMeal`; `roles` is the container of allowed price
+            roles. """
         # check name:
         if not len(name):
             raise ValueError('Meal names must not be empty')
@@ -404,23 +1335,28 @@ class BaseBuilder(object):
                 if not len(note):
                     raise ValueError('Note must not be empty. Left it out, if not needed')
         # process prices:
-        if prices is None:
-            prices = {}
-        else:
+        if prices is not None:
             for role in prices:
-                if role not in self.allowed_price_roles:
+                if role not in roles:
                     raise ValueError('Unknown price role "%s"' % role)
                 if not isinstance(prices[role], int):
                     raise TypeError('Unsupport price type - expect integer')
-        # ensure we have an entry for this date
-        date = self._handleDate(date)
-        if date not in self._days:
-            self._days[date] = OrderedDict()
-        # ensure we have a category element for this category
-        if category not in self._days[date]:
-            self._days[date][category] = []
-        # add meal into category:
-        self._days[date][category].append((name, notes or [], prices))
+                if self._compact and not _compactPrice(prices[role]):
+                    raise ValueError('Prices of compact builders must fit '
+                                     'into 32 bit integers')
+
+    def _buildMeal(self, category, name, notes, prices):
+        """ Internal method which creates the stored representation of an
+            already validated meal.
+
+            :rtype: tuple with category name and meal"""
+        if prices is None:
+            prices = {}
+        if self._compact:
+            return self._intern(category), \
+                CompactMeal(name, [self._intern(note) for note in notes or ()],
+                            prices, self._priceRoles)
+        return category, (name, notes or [], prices)
 
     def setDayClosed(self, date):
         """ Define that the canteen is closed on this date. If a day is closed,
@@ -428,7 +1364,9 @@ class BaseBuilder(object):
 
             :param date: Date of the day
             :type date: datetime.date"""
-        self._days[self._handleDate(date)] = False
+        date = self._handleDate(date)
+        self._days[date] = False
+        self._dayChanged(date)
 
     def clearDay(self, date):
         """ Remove all stored information about this date (meals or closed
@@ -439,6 +1377,7 @@ class BaseBuilder(object):
         date = self._handleDate(date)
         if date in self._days:
             del self._days[date]
+        self._dayChanged(date)
 
     def dayCount(self):
         """ Return the number of dates for which information are stored.
@@ -457,6 +1396,20 @@ class BaseBuilder(object):
             return False
         return len(self._days[date]) > 0
 
+    def _intern(self, value):
+        """ Returns the first stored equal string for `value`, so that
+            compact builders keep every category name and note once. """
+        return self._strings.setdefault(value, value)
+
+    def _dayChanged(self, date):
+        """ Internal method that is called after the stored information of
+            a date have been changed.
+
+            :param datetime.date date: the changed date"""
+        self._xmlCache.pop(date, None)
+        self._dayFingerprints.pop(date, None)
+        self._daysFingerprint = None
+
     @staticmethod
     def _handleDate(date):
         """ Internal method that is used to handle/convert input date. It
@@ -470,6 +1423,562 @@ class BaseBuilder(object):
             raise TypeError('Dates needs to be specified by datetime.date')
         return date
 
+    # methods to read feeds
+    # ---------------------
+
+    @classmethod
+    def fromXMLFeed(cls, source, **kwargs):
+        """ Creates a builder from an OpenMensa v2 xml feed, e.g. one
+            generated by :meth:`toXMLFeed`. The feed is read with an
+            incremental pull parser; every day is dropped from the parse tree
+            as soon as it is stored, so the full document is never kept in
+            memory. The meals are not validated again.
+
+            :param source: file name, binary file object or the feed itself
+                as `str`/`bytes`
+            :param kwargs: passed to the constructor (e.g. `compact=True`)
+            :rtype: an instance of this class"""
+        if isinstance(source, bytes) and source.lstrip().startswith(b'<'):
+            source = io.BytesIO(source)
+        elif isinstance(source, type(u'')) and source.lstrip().startswith('<'):
+            source = io.BytesIO(source.encode('utf-8'))
+        builder = cls(**kwargs)
+        builder._readXMLFeed(iterparse(source, events=('start', 'end')))
+        return builder
+
+    def _readXMLFeed(self, events):
+        canteen = None
+        parents = []
+        for event, element in events:
+            tag = element.tag.rpartition('}')[2]
+            if event == 'start':
+                if tag == 'canteen':
+                    canteen = element
+                parents.append(tag)
+                continue
+            parents.pop()
+            parent = parents[-1] if parents else None
+            if tag == 'version':
+                self._version = element.text or ''
+                continue
+            if parent != 'canteen':
+                continue
+            if tag in ('name', 'address', 'city', 'phone', 'email',
+                         'availability'):
+                setattr(self, '_' + tag, element.text or '')
+            elif tag == 'location':
+                self._location = (element.get('longitude'),
+                                  element.get('latitude'))
+            elif tag == 'feed':
+                self.feeds.append(self._readFeedTag(element))
+            elif tag == 'day':
+                self._readDayTag(element)
+            # drop processed children of the canteen element
+            canteen.clear()
+
+    @staticmethod
+    def _readFeedTag(element):
+        values = {'name': element.get('name'),
+                  'priority': int(element.get('priority')),
+                  'source': None, 'retry': None}
+        for child in element:
+            tag = child.tag.rpartition('}')[2]
+            if tag == 'schedule':
+                for name in ('dayOfMonth', 'dayOfWeek', 'hour', 'minute',
+                             'retry'):
+                    values[name] = child.get(name)
+            elif tag in ('url', 'source'):
+                values[tag] = child.text or ''
+        return Feed(**values)
+
+    def _readDayTag(self, element):
+        date = datetime.datetime.strptime(element.get('date'),
+                                          '%Y-%m-%d').date()
+        categories = OrderedDict()
+        for category in element:
+            if category.tag.rpartition('}')[2] == 'closed':
+                self._days[date] = False
+                self._dayChanged(date)
+                return
+            categoryName = category.get('name')
+            meals = []
+            for meal in category:
+                mealName = ''
+                notes = []
+                prices = {}
+                for child in meal:
+                    tag = child.tag.rpartition('}')[2]
+                    if tag == 'name':
+                        mealName = child.text or ''
+                    elif tag == 'note':
+                        notes.append(child.text or '')
+                    elif tag == 'price':
+                        euros, _, cents = child.text.strip().partition('.')
+                        prices[child.get('role')] = int(euros) * 100 + \
+                            int(cents or 0)
+                categoryName, mealData = self._buildMeal(
+                    categoryName, mealName, notes, prices)
+                meals.append(mealData)
+            categories[categoryName] = meals
+        self._days[date] = categories
+        self._dayChanged(date)
+
+    # methods to save and load builders
+    # ---------------------------------
+
+    def dump(self, fp):
+        """ Writes all information of this builder as compact binary
+            snapshot into a file, which :meth:`load` reads much faster than
+            a feed. Every string is stored once, dates as ordinals and
+            prices as 32 bit integers. The format is versioned (see
+            :data:`snapshot_version`); newer versions can read older
+            snapshots.
+
+            :param fp: binary file object to write to
+            :raises ValueError: if the data do not fit into the format,
+                e.g. unknown price roles or too large prices"""
+        refs = _SnapshotRefs()
+        ref = refs.ref
+
+        roles = self._priceRoles
+        if len(roles) > 16:
+            raise ValueError('Snapshots support at most 16 price roles')
+        location = self._location or (None, None)
+        try:
+            parts = [struct.pack(
+                '<{0}I'.format(len(_metadataFields) + 2),
+                *[ref(getattr(self, name)) for name in _metadataFields] +
+                [ref(location[0]), ref(location[1])])]
+            parts.append(_snapshotCount.pack(len(roles)))
+            parts.append(struct.pack('<{0}I'.format(len(roles)),
+                                     *[ref(role) for role in roles]))
+            parts.append(_snapshotCount.pack(len(self.feeds)))
+            for feed in self.feeds:
+                if feed.priority is None:
+                    kind, priority = _noPriority, 0
+                elif isinstance(feed.priority, int):
+                    kind, priority = _intPriority, feed.priority
+                else:  # accepted by define and toXMLFeed, too
+                    kind, priority = _stringPriority, ref(str(feed.priority))
+                parts.append(_snapshotFeed.pack(
+                    ref(feed.name), kind, priority, ref(feed.url),
+                    ref(feed.source), ref(feed.dayOfWeek),
+                    ref(feed.dayOfMonth), ref(feed.hour), ref(feed.minute),
+                    ref(feed.retry)))
+            offset = _snapshotHeader.size + sum(len(part) for part in parts)
+            index = []
+            # mask and ordered roles per roles of a prices dict
+            layouts = {}
+            for date in sorted(self._days):
+                record = self._dumpDay(self._days[date], refs, roles, layouts)
+                index.append(_snapshotEntry.pack(date.toordinal(), offset,
+                                                 len(record)))
+                parts.append(record)
+                offset += len(record)
+            encoded = [value.encode('utf-8') for value in refs.table]
+            ends = [0]
+            for value in encoded:
+                ends.append(ends[-1] + len(value))
+            stringOffset = offset
+            parts.append(struct.pack('<{0}I'.format(len(ends)), *ends))
+            parts.extend(encoded)
+            header = _snapshotHeader.pack(
+                _snapshotMagic, snapshot_version,
+                _snapshotCompact if self._compact else 0, len(refs.table),
+                stringOffset, len(index),
+                stringOffset + 4 * len(ends) + ends[-1])
+        except struct.error as error:
+            raise ValueError('Cannot store snapshot: {0}'.format(error))
+        fp.write(header)
+        fp.write(b''.join(parts))
+        fp.write(b''.join(index))
+
+    @staticmethod
+    def _dumpDay(data, refs, roles, layouts):
+        if data is False:
+            return _snapshotDay.pack(_closedDay, 0, 0, 0)
+        if len(data) >= _closedDay:
+            raise ValueError('Too many categories for a snapshot')
+        categoryNames = list(map(refs.__getitem__, data))
+        mealCounts = []
+        meals = []
+        for categoryMeals in data.values():
+            mealCounts.append(len(categoryMeals))
+            meals.extend(categoryMeals)
+        if meals:
+            names, notes, prices = zip(*map(tuple, meals))
+        else:
+            names = notes = prices = ()
+        mealNames = list(map(refs.__getitem__, names))
+        noteCounts = list(map(len, notes))
+        notes = list(map(refs.__getitem__, chain.from_iterable(notes)))
+        # price roles (in dict order) -> mask and roles in snapshot order
+        keys = list(map(tuple, prices))
+        for key in set(keys):
+            if key not in layouts:
+                if any(role not in roles for role in key):
+                    raise ValueError('Unknown price role in {0}'.format(
+                        sorted(key)))
+                layouts[key] = (
+                    sum(1 << bit for bit, role in enumerate(roles)
+                        if role in key),
+                    [role for role in roles if role in key])
+        masks = [layouts[key][0] for key in keys]
+        if len(set(keys)) == 1 and len(keys[0]) > 1:
+            # all meals have the same roles
+            values = list(chain.from_iterable(map(
+                itemgetter(*layouts[keys[0]][1]), prices)))
+        else:
+            values = [mealPrices[role] for key, mealPrices in zip(keys, prices)
+                      for role in layouts[key][1]]
+        return _snapshotDay.pack(len(categoryNames), len(mealNames),
+                                 len(notes), len(values)) + \
+            _dayLayout(len(categoryNames), len(mealNames), len(notes),
+                       len(values)).pack(*(categoryNames + mealCounts +
+                                           mealNames + noteCounts + masks +
+                                           notes + values))
+
+    @classmethod
+    def load(cls, fp, dates=None, **kwargs):
+        """ Creates a builder from a snapshot written by :meth:`dump`.
+            Files are mapped into memory, so only the read days are
+            decoded: together with `dates` a single day can be read without
+            decoding the whole snapshot. Afterwards `fp` is positioned
+            behind the snapshot.
+
+            :param fp: binary file object, positioned at the snapshot
+            :param dates: optional iterable of dates to load, days missing
+                in the snapshot are skipped
+            :param kwargs: passed to the constructor; `compact` defaults to
+                the setting of the dumped builder
+            :raises ValueError: if `fp` contains no (supported) or a
+                truncated snapshot
+            :rtype: an instance of this class"""
+        data, base, start = _snapshotData(fp)
+        try:
+            reader = _SnapshotReader(data, base)
+            kwargs.setdefault('compact',
+                              bool(reader.flags & _snapshotCompact))
+            builder = cls(**kwargs)
+            values, builder._location, _, builder.feeds = reader.metadata()
+            for name, value in zip(_metadataFields, values):
+                setattr(builder, name, value)
+            if dates is None:
+                entries = [reader.entry(index)
+                           for index in range(reader.dayCount)]
+            else:
+                entries = [reader.find(builder._handleDate(date))
+                           for date in dates]
+            buildMeal = builder._buildMeal if builder._compact else None
+            fromordinal = datetime.date.fromordinal
+            for entry in entries:
+                if entry is None:
+                    continue
+                builder._days[fromordinal(entry[0])] = \
+                    reader.day(entry[1], buildMeal)
+        except struct.error as error:
+            raise ValueError('Corrupt canteen snapshot: {0}'.format(error))
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+        if start is not None:
+            fp.seek(start + reader.size)
+        return builder
+
+    # methods to combine feeds
+    # ------------------------
+
+    #: conflict policies supported by :meth:`merge`
+    merge_strategies = ('prefer-newest', 'union-notes', 'prefer-closed')
+
+    def merge(self, *others, **kwargs):
+        """ Merges the stored days of other builders into this builder, e.g.
+            the results of parsers for prices, menus and closed days of the
+            same canteen. The builders are merged in the passed order, later
+            builders are considered newer. The meals were validated when
+            they were added, so they are not checked again; meal tuples are
+            shared between the builders.
+
+            Days only stored in one builder are taken as they are. For days
+            stored in both, the categories are merged by name and the meals
+            of a category by their name; meals with the same name are
+            matched in their order. New categories and meals are appended.
+            The `strategy` keyword defines how conflicts are resolved:
+
+            * ``'prefer-newest'`` (default): a meal with the same name is
+              replaced by the newer one; closing or opening a day in a newer
+              builder replaces the whole day
+            * ``'union-notes'``: like ``'prefer-newest'``, but meals with the
+              same name keep the union of their notes and prices (the newer
+              price wins for the same role)
+            * ``'prefer-closed'``: like ``'prefer-newest'``, but a day closed
+              in any builder stays closed
+
+            Metadata (name, address, ...) of newer builders replaces the
+            stored one if set; feeds are merged by their name.
+
+            :param others: builders to merge into this one
+            :param str strategy: one of :attr:`merge_strategies`
+            :return: this builder"""
+        strategy = kwargs.pop('strategy', 'prefer-newest')
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments: {0}'.format(
+                ', '.join(sorted(kwargs))))
+        if strategy not in self.merge_strategies:
+            raise ValueError('Unknown merge strategy "{0}"'.format(strategy))
+        for other in others:
+            self._mergeMetadata(other)
+            for date, data in other._days.items():
+                day = self._days.get(date)
+                if day is False and strategy == 'prefer-closed':
+                    continue
+                if day is None or day is False or data is False:
+                    self._days[date] = self._adoptDay(data)
+                else:
+                    self._mergeDay(day, data, strategy == 'union-notes')
+                self._dayChanged(date)
+        return self
+
+    def _mergeMetadata(self, other):
+        for name in ('_version', '_name', '_address', '_city', '_phone',
+                     '_email', '_location', '_availability'):
+            value = getattr(other, name)
+            if value is not None:
+                setattr(self, name, value)
+        if other.feeds:
+            names = dict((feed.name, index)
+                         for index, feed in enumerate(self.feeds))
+            for feed in other.feeds:
+                if feed.name in names:
+                    self.feeds[names[feed.name]] = feed
+                else:
+                    names[feed.name] = len(self.feeds)
+                    self.feeds.append(feed)
+
+    def _adoptDay(self, data):
+        """ Copies the category structure of a day of another builder; the
+            meals themselves are shared if they have the stored format of
+            this builder. """
+        if data is False:
+            return False
+        return OrderedDict((self._intern(name) if self._compact else name,
+                            [self._adoptMeal(meal) for meal in meals])
+                           for name, meals in data.items())
+
+    def _adoptMeal(self, meal):
+        if self._compact:
+            if isinstance(meal, CompactMeal) and \
+                    meal.roles == self._priceRoles:
+                return meal
+            name, notes, prices = meal
+            return CompactMeal(name, [self._intern(note) for note in notes],
+                               prices, self._priceRoles)
+        if isinstance(meal, CompactMeal):
+            return tuple(meal)
+        return meal
+
+    def _mergeDay(self, day, data, unionNotes):
+        for name, meals in data.items():
+            if self._compact:
+                name = self._intern(name)
+            stored = day.get(name)
+            if not stored:
+                day[name] = [self._adoptMeal(meal) for meal in meals]
+                continue
+            # positions of the stored meals per name; meals with the same
+            # name are matched in their order, every stored meal once
+            positions = {}
+            for index, meal in enumerate(stored):
+                positions.setdefault(_mealName(meal), deque()).append(index)
+            for meal in meals:
+                mealName = _mealName(meal)
+                indexes = positions.get(mealName)
+                if not indexes:
+                    stored.append(self._adoptMeal(meal))
+                    continue
+                index = indexes.popleft()
+                if unionNotes:
+                    _, oldNotes, oldPrices = stored[index]
+                    _, notes, prices = meal
+                    notes = list(oldNotes) + [note for note in notes
+                                              if note not in oldNotes]
+                    oldPrices = dict(oldPrices)
+                    oldPrices.update(prices)
+                    meal = (mealName, notes, oldPrices)
+                stored[index] = self._adoptMeal(meal)
+
+    # methods to compare feeds
+    # ------------------------
+
+    def diff(self, other):
+        """ Compares the stored days of this builder with `other` (the newer
+            state), e.g. with the builder of the previous parser run. Days
+            are compared by their :meth:`dayFingerprint` first, categories
+            in their canonical form (sorted notes and prices), like they are
+            serialized; the meals of
+            modified categories are matched with a hash table, so the
+            runtime is linear in the number of meals. Empty categories are
+            ignored, the canteen metadata and feeds are not compared.
+
+            :param BaseBuilder other: builder to compare with
+            :rtype: :class:`FeedDiff`"""
+        added = []
+        removed = []
+        modified = []
+        for date in self._days:
+            if date not in other._days:
+                removed.append(date)
+        for date, data in other._days.items():
+            if date not in self._days:
+                added.append(date)
+                continue
+            if self.dayFingerprint(date) == other.dayFingerprint(date):
+                continue
+            old = self._categoryKeys(self._days[date])
+            new = self._categoryKeys(data)
+            if old == new:
+                continue
+            modified.append(self._diffDay(date, old, new))
+        return FeedDiff(sorted(added), sorted(removed),
+                        sorted(modified, key=lambda day: day.date))
+
+    def dayFingerprint(self, date):
+        """ Returns a stable hash of the canonical content of a day: the
+            categories in their order, the meals with sorted notes and
+            sorted price roles. Equal days have equal fingerprints across
+            builders, processes and python versions. The fingerprint is
+            cached until the day is changed via :meth:`addMeal`,
+            :meth:`setDayClosed` or :meth:`clearDay`.
+
+            :param date: Date of the day
+            :type date: datetime.date
+            :return: hex digest or `None` if nothing is stored for the date
+            :rtype: str"""
+        date = self._handleDate(date)
+        fingerprint = self._dayFingerprints.get(date)
+        if fingerprint is None and date in self._days:
+            fingerprint = hashlib.sha1(
+                self._dayCanonical(self._days[date])).hexdigest()
+            self._dayFingerprints[date] = fingerprint
+        return fingerprint
+
+    def fingerprint(self):
+        """ Returns a stable hash of the whole feed: the metadata, the feeds
+            and the :meth:`dayFingerprint` of every stored day. Only the
+            days changed since the last call are hashed again, for an
+            unchanged canteen only the metadata is hashed. Two builders with
+            equal fingerprints generate the same feed.
+
+            :rtype: str"""
+        if self._daysFingerprint is None:
+            days = hashlib.sha1()
+            for date in sorted(self._days):
+                days.update((str(date) + self.dayFingerprint(date))
+                            .encode('ascii'))
+            self._daysFingerprint = days.hexdigest()
+        parts = [self._daysFingerprint]
+        for value in (self._version, self._name, self._address, self._city,
+                      self._phone, self._email, self._availability):
+            parts.append('' if value is None else 'V' + value)
+        if self._location is not None:
+            parts.extend(('L', self._location[0], self._location[1]))
+        for feed in sorted(self.feeds, key=lambda v: v.priority):
+            parts.append('F')
+            parts.extend('' if value is None else str(value)
+                         for value in feed)
+        return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _dayCanonical(data):
+        """ Serializes a day for :meth:`dayFingerprint`; NUL characters are
+            not allowed in xml and separate the values. """
+        if data is False:
+            return b'closed'
+        parts = []
+        for name, meals in data.items():
+            if not len(meals):
+                continue
+            parts.extend(('C', name))
+            for meal in meals:
+                name, notes, prices = meal
+                parts.extend(('M', name))
+                for note in sorted(notes):
+                    parts.extend(('N', note))
+                for role in sorted(prices):
+                    parts.extend(('P', role, str(prices[role])))
+        return '\0'.join(parts).encode('utf-8')
+
+    @classmethod
+    def _categoryKeys(cls, data):
+        """ Returns the canonical content of a day: `False` for closed days,
+            otherwise an ordered list of `(name, meal keys)` tuples for all
+            non-empty categories. """
+        if data is False:
+            return False
+        return [(name, tuple([cls._mealKey(meal) for meal in meals]))
+                for name, meals in data.items() if len(meals)]
+
+    @staticmethod
+    def _mealKey(meal):
+        name, notes, prices = meal
+        return name, tuple(sorted(notes)), tuple(sorted(prices.items()))
+
+    @staticmethod
+    def _diffDay(date, old, new):
+        closed = None
+        if old is False:
+            closed, old = False, []
+        elif new is False:
+            closed, new = True, []
+        oldCategories = dict(old)
+        newCategories = dict(new)
+        addedCategories = [name for name, _ in new
+                           if name not in oldCategories]
+        removedCategories = [name for name, _ in old
+                             if name not in newCategories]
+        modifiedCategories = []
+        for name, meals in new:
+            if name not in oldCategories or oldCategories[name] == meals:
+                continue
+            # count meals as multiset to find the added and removed ones
+            counts = {}
+            for meal in meals:
+                counts[meal] = counts.get(meal, 0) + 1
+            removedMeals = []
+            for meal in oldCategories[name]:
+                if counts.get(meal):
+                    counts[meal] -= 1
+                else:
+                    removedMeals.append(meal)
+            addedMeals = []
+            for meal in meals:
+                if counts.get(meal):
+                    counts[meal] -= 1
+                    addedMeals.append(meal)
+            # an added and a removed meal with the same name are modified
+            removedByName = {}
+            for index, meal in enumerate(removedMeals):
+                removedByName.setdefault(meal[0], []).append(index)
+            replaced = set()
+            modifiedMeals = []
+            unmatched = []
+            for meal in addedMeals:
+                indexes = removedByName.get(meal[0])
+                if indexes:
+                    replaced.add(indexes[0])
+                    modifiedMeals.append((
+                        _mealTuple(removedMeals[indexes.pop(0)]),
+                        _mealTuple(meal)))
+                else:
+                    unmatched.append(_mealTuple(meal))
+            modifiedCategories.append(CategoryDiff(
+                name, unmatched,
+                [_mealTuple(meal) for index, meal in enumerate(removedMeals)
+                 if index not in replaced],
+                modifiedMeals))
+        return DayDiff(date, closed, addedCategories, removedCategories,
+                       modifiedCategories)
+
     # methods to create feed
     # ----------------------
 
@@ -483,29 +1992,58 @@ class BaseBuilder(object):
 
         return feed
 
-    def toXMLFeed(self):
+    def toXMLFeed(self, stream=None, dates=None):
         """ Convert this cateen information into string
             which is a valid OpenMensa v2 xml feed
 
-            :rtype: str"""
-        feed = self.toXML()
+            The feed is serialized by :meth:`iterXMLFeed` without building
+            a XML Document; the output is identical to a pretty printed
+            :meth:`toXML`.
 
-        xml_header = '<?xml version="1.0" encoding="UTF-8"?>\n'
-        return xml_header + feed.toprettyxml(indent='  ')
+            :param stream: Optional file-like object; if passed the feed is
+                 written chunk by chunk into it and `None` is returned.
+            :param dates: Optional iterable of dates; only these days are
+                 included, dates without stored information as empty days.
+                 Together with :meth:`diff` this generates a feed of the
+                 changed days only.
+            :rtype: str"""
+        if stream is None:
+            return ''.join(self.iterXMLFeed(dates))
+        for chunk in self.iterXMLFeed(dates):
+            stream.write(chunk)
+
+    def iterXMLFeed(self, dates=None):
+        """ Generates the OpenMensa v2 xml feed piece by piece. Every day is
+            serialized as its own chunk, so the memory usage does not depend
+            on the number of stored days.
+
+            :param dates: see :meth:`toXMLFeed`
+            :rtype: iterator over str"""
+        yield xml_header
+        yield '<openmensa' + _xmlAttributes(self._feedAttributes) + '>\n'
+        if self.version is not None:
+            yield _xmlStringTag(xml_indent, 'version', self.version)
+        for chunk in self._iterCanteenTag(xml_indent, dates):
+            yield chunk
+        yield '</openmensa>\n'
+
+    #: attributes of the main openmensa element with correct xml namespaces
+    _feedAttributes = (
+        ('version', '2.1'),
+        ('xmlns', 'http://openmensa.org/open-mensa-v2'),
+        ('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance'),
+        ('xsi:schemaLocation', 'http://openmensa.org/open-mensa-v2 ' +
+                               'http://openmensa.org/open-mensa-v2.xsd'),
+    )
 
-    @staticmethod
-    def _createDocument():
+    @classmethod
+    def _createDocument(cls):
         # create xml document
         output = Document()
         # build main openmensa element with correct xml namespaces
         openmensa = output.createElement('openmensa')
-        openmensa.setAttribute('version', '2.1')
-        openmensa.setAttribute('xmlns', 'http://openmensa.org/open-mensa-v2')
-        openmensa.setAttribute('xmlns:xsi',
-                               'http://www.w3.org/2001/XMLSchema-instance')
-        openmensa.setAttribute('xsi:schemaLocation',
-                               'http://openmensa.org/open-mensa-v2 ' +
-                               'http://openmensa.org/open-mensa-v2.xsd')
+        for name, value in cls._feedAttributes:
+            openmensa.setAttribute(name, value)
 
         return openmensa, output
 
@@ -554,6 +2092,130 @@ class BaseBuilder(object):
             canteen.appendChild(day)
         return canteen
 
+    def _iterCanteenTag(self, indent, dates=None):
+        """ String counterpart of :meth:`toTag`: yields the canteen tag with
+            its metadata and feeds as first chunk and then one chunk per
+            day. `dates` restricts the included days, see
+            :meth:`toXMLFeed`. """
+        inner = indent + xml_indent
+        head = [_xmlStringTag(inner, tag_name, value)
+                for tag_name, value in (('name', self._name),
+                                        ('address', self._address),
+                                        ('city', self._city),
+                                        ('phone', self._phone),
+                                        ('email', self._email))
+                if value is not None]
+        if self._location is not None:
+            head.append(inner + '<location' + _xmlAttributes((
+                ('longitude', self._location[0]),
+                ('latitude', self._location[1]))) + '/>\n')
+        if self._availability is not None:
+            head.append(_xmlStringTag(inner, 'availability',
+                                      self._availability))
+        for feed in sorted(self.feeds, key=lambda v: v.priority):
+            head.append(feed.toXMLString(inner))
+        if dates is None:
+            dates = sorted(self._days.keys())
+        else:
+            dates = sorted(set(self._handleDate(date) for date in dates))
+        if not head and not dates:
+            yield indent + '<canteen/>\n'
+            return
+        yield indent + '<canteen>\n' + ''.join(head)
+        # iterate above all days (sorted):
+        for date in dates:
+            if date not in self._days or not self.cacheXML:
+                yield self._dayToXMLString(date, self._days.get(date, {}),
+                                           inner)
+                continue
+            day = self._xmlCache.get(date)
+            if day is None:
+                self._xmlCacheMisses += 1
+                day = self._dayToXMLString(date, self._days[date], inner)
+                self._xmlCache[date] = day
+            else:
+                self._xmlCacheHits += 1
+            yield day
+        yield indent + '</canteen>\n'
+
+    def _feedState(self):
+        """ Returns all data needed to serialize this canteen as tuple of
+            plain python types, e.g. to send it to another process. The
+            stored days are passed as they are; only compact builders
+            convert their meals into the default `(name, notes, prices)`
+            tuples. See :meth:`_fromFeedState`. """
+        days = self._days
+        if self._compact:
+            days = dict((date, data if data is False else OrderedDict(
+                (category, [tuple(meal) for meal in meals])
+                for category, meals in data.items()))
+                for date, data in days.items())
+        return (self._version, self._name, self._address, self._city,
+                self._phone, self._email, self._location, self._availability,
+                list(self.feeds), days)
+
+    @classmethod
+    def _fromFeedState(cls, state):
+        """ Creates a builder from a :meth:`_feedState` result which
+            generates the same feed as the original builder. """
+        builder = cls()
+        (builder._version, builder._name, builder._address, builder._city,
+         builder._phone, builder._email, builder._location,
+         builder._availability, builder.feeds, builder._days) = state
+        return builder
+
+    def xmlCacheInfo(self):
+        """ Reports the usage of the per day xml cache (see `cacheXML`).
+
+            :rtype: :class:`CacheInfo`"""
+        return CacheInfo(self._xmlCacheHits, self._xmlCacheMisses, None,
+                         len(self._xmlCache))
+
+    def clearXMLCache(self):
+        """ Drop all cached days and reset the statistics of the xml cache.
+            Needed after modifying `_days` directly; drops the cached
+            fingerprints (see :meth:`fingerprint`), too. """
+        self._xmlCache.clear()
+        self._dayFingerprints.clear()
+        self._daysFingerprint = None
+        self._xmlCacheHits = 0
+        self._xmlCacheMisses = 0
+
+    @classmethod
+    def _dayToXMLString(cls, date, data, indent):
+        inner = indent + xml_indent
+        day = indent + '<day' + _xmlAttributes((('date', str(date)),))
+        if data is False:  # canteen closed
+            return day + '>\n' + inner + '<closed/>\n' + indent + '</day>\n'
+        # canteen is open, skip empty categories:
+        categories = [cls._categoryToXMLString(name, data[name], inner)
+                      for name in data if len(data[name])]
+        if not categories:
+            return day + '/>\n'
+        return day + '>\n' + ''.join(categories) + indent + '</day>\n'
+
+    @classmethod
+    def _categoryToXMLString(cls, name, data, indent):
+        inner = indent + xml_indent
+        return indent + '<category' + _xmlAttributes((('name', name),)) + \
+            '>\n' + ''.join([cls._mealToXMLString(meal, inner)
+                             for meal in data]) + \
+            indent + '</category>\n'
+
+    @staticmethod
+    def _mealToXMLString(mealData, indent):
+        name, notes, prices = mealData
+        inner = indent + xml_indent
+        parts = [indent, '<meal>\n', _xmlStringTag(inner, 'name', name)]
+        for note in sorted(notes):
+            parts.append(_xmlStringTag(inner, 'note', note))
+        for role in sorted(prices):
+            parts.append('{0}<price role="{1}">{2}.{3:0>2}</price>\n'.format(
+                inner, _escapeXMLAttribute(role), prices[role] // 100,
+                prices[role] % 100))
+        parts.extend((indent, '</meal>\n'))
+        return ''.join(parts)
+
     @classmethod
     def _buildStringTag(cls, tag_name, value, output):
         tag = output.createElement(tag_name)
@@ -617,6 +2279,7 @@ class LazyBuilder(BaseBuilder):
     def __init__(self, *args, **kwargs):
         super(LazyBuilder, self).__init__(*args, **kwargs)
         self.legendData = None
+        self._legend = None
         #: function passed as key parameter to :py:func:`.buildLegend` and
         #: :py:func:`.extractNotes`; use `lambda v: v.lower()` for
         #: case-insensitive legend names (instance member)
@@ -628,6 +2291,20 @@ class LazyBuilder(BaseBuilder):
         """ Set or genernate the legend data from this canteen.
             Uses :py:func:`.buildLegend` for genernating """
         self.legendData = buildLegend(*args, key=self.legendKeyFunc, **kwargs)
+        self._legend = None
+
+    def _getLegend(self):
+        """ Returns the :class:`Legend` for the current legend data, note
+            regex and key function. """
+        legend = self._legend
+        if legend is None or legend.legend is not self.legendData \
+                or legend.regex is not compilePattern(self.extra_regex or
+                                                      default_extra_regex) \
+                or legend.key is not self.legendKeyFunc:
+            legend = self._legend = Legend(self.legendData,
+                                           regex=self.extra_regex,
+                                           key=self.legendKeyFunc)
+        return legend
 
     def setAdditionalCharges(self, default, additional):
         """ This is a helper function, which fast up the calculation
@@ -649,21 +2326,92 @@ class LazyBuilder(BaseBuilder):
 
             :param roles:  Is passed as role parameter to :func:`buildPrices`
             """
+        super(LazyBuilder, self).addMeal(*self._convertMeal(
+            date, category, name, notes, prices, roles))
+
+    def _convertMeal(self, date, category, name, notes=None, prices=None,
+                     roles=None):
         if self.legendData:  # do legend extraction
-            name, notes = extractNotes(name, notes or [],
-                                       legend=self.legendData,
-                                       key=self.legendKeyFunc,
-                                       regex=self.extra_regex)
+            name, notes = self._getLegend().extract(name, notes or [])
         prices = buildPrices(prices or {}, roles,
                              default=self.additionalCharges[0],
                              additional=self.additionalCharges[1])
         if len(name) > 250:
             name = name[:247] + '...'
-        super(LazyBuilder, self).addMeal(extractDate(date), category, name,
-                                         notes or [], prices)
+        return date, category, name, notes or [], prices
+
+    def _mealConverter(self):
+        return self._convertMeal
 
     @staticmethod
     def _handleDate(date):
         return extractDate(date)
 
 OpenMensaCanteen = LazyBuilder
+
+
+# Rendering of many canteens
+# --------------------------
+
+#: Result of :func:`renderFeeds` for a single builder: the feed as string (or
+#: `None` if it was written to `path`) and the seconds needed to render it.
+RenderedFeed = namedtuple('RenderedFeed', ['xml', 'path', 'seconds'])
+
+
+def _renderFeed(builder, path):
+    start = time.time()
+    if path is None:
+        xml = builder.toXMLFeed()
+    else:
+        xml = None
+        with io.open(path, 'w', encoding='utf-8') as stream:
+            builder.toXMLFeed(stream)
+    return RenderedFeed(xml, path, time.time() - start)
+
+
+def _renderFeedState(state, path):
+    return _renderFeed(BaseBuilder._fromFeedState(state), path)
+
+
+def renderFeeds(builders, workers=None, mode='process', paths=None):
+    """ Serializes many canteens concurrently. The feeds are identical to
+        the ones of calling :meth:`BaseBuilder.toXMLFeed` for every builder.
+
+        In `process` mode only the meal data of every builder (see
+        :meth:`BaseBuilder._feedState`) is sent to a process pool, so
+        legends and other unpicklable helpers of the builders do not matter.
+        As the feed is rendered by a :class:`BaseBuilder` there, use the
+        `thread` mode for subclasses with their own serialization.
+
+        :param list builders: builders to render
+        :param int workers: size of the pool, `None` uses the default of
+            :mod:`concurrent.futures`; `1` renders in the current thread.
+        :param str mode: `process` or `thread`
+        :param list paths: optional file names (one per builder) to write the
+            feeds to, instead of returning them.
+        :rtype: list of :class:`RenderedFeed` in the order of `builders`
+        """
+    if mode not in ('process', 'thread'):
+        raise ValueError('mode must be "process" or "thread"')
+    builders = list(builders)
+    if paths is None:
+        paths = [None] * len(builders)
+    else:
+        paths = list(paths)
+        if len(paths) != len(builders):
+            raise ValueError('paths must contain one path per builder')
+    if workers == 1:
+        return [_renderFeed(builder, path)
+                for builder, path in zip(builders, paths)]
+    if futures is None:
+        raise ImportError('renderFeeds needs concurrent.futures (or the '
+                          'futures backport)')
+    if mode == 'thread':
+        with futures.ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(_renderFeed, builders, paths))
+    with futures.ProcessPoolExecutor(workers) as executor:
+        # send several canteens per message to the workers
+        chunksize = max(1, len(builders) // (4 * (workers or cpu_count())))
+        return list(executor.map(_renderFeedState,
+                                 [builder._feedState() for builder in builders],
+                                 paths, chunksize=chunksize))
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import datetime
+
+
 class Field(object):
-	convertFunc = lambda v: v
+	convertFunc = staticmethod(lambda v: v)
 
 	def __init__(self, name = None, default = None, null=True):
 		self.name = name
@@ -26,5 +29,17 @@ class IntegerField(Field):
 class FloatField(Field):
 	convertFunc = float
 
+class BooleanField(Field):
+	convertFunc = bool
+
+class ListField(Field):
+	convertFunc = list
+
+class DictField(Field):
+	convertFunc = dict
+
+class DateField(Field):
+	convertFunc = staticmethod(lambda v: datetime.datetime.strptime(v, '%Y-%m-%d').date())
+
 class DateTimeField(Field):
-	convertFunc = lambda v: datetime.datetime.strptime(v, '%Y-%m-%dT%H:%M:%S')
+	convertFunc = staticmethod(lambda v: datetime.datetime.strptime(v, '%Y-%m-%dT%H:%M:%S'))
@@ -0,0 +1,43 @@
+# -*- coding: UTF-8 -*-
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+if sys.version_info < (3, 5):  # the api wrapper needs python >= 3.5
+    collect_ignore = ['test_async.py', 'test_cache.py', 'test_canteen.py',
+                      'test_metrics.py', 'test_models.py', 'test_wrapper.py']
+else:
+    from .stub import StubServer
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope='session')
+def certificate(tmp_path_factory):
+    """ Self-signed certificate for 127.0.0.1 as (key + cert) pem file. """
+    if shutil.which('openssl') is None:
+        pytest.skip('openssl is needed to create a test certificate')
+    path = str(tmp_path_factory.mktemp('tls') / 'stub.pem')
+    subprocess.check_call(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+         '-days', '1', '-subj', '/CN=127.0.0.1',
+         '-addext', 'subjectAltName=IP:127.0.0.1',
+         '-keyout', path, '-out', path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return path
+
+
+@pytest.fixture
+def tlsStub(certificate):
+    server = StubServer(certfile=certificate)
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,180 @@
+# -*- coding: UTF-8 -*-
+""" Local HTTP/1.1 server which simulates the OpenMensa API v2. """
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlencode, urlparse, parse_qs
+import hashlib
+import json
+import ssl
+import threading
+import time
+
+
+def canteen(id):
+    return {'id': id, 'name': 'Mensa {0}'.format(id),
+            'address': 'Straße {0}'.format(id),
+            'latitude': 52.0 + id / 1000.0, 'longitude': 13.0}
+
+
+def days():
+    return [{'date': '2013-03-0{0}'.format(day), 'closed': day == 5}
+            for day in range(4, 7)]
+
+
+def meals(date):
+    return [{'id': number, 'name': 'Gericht {0} am {1}'.format(number, date),
+             'category': 'Essen {0}'.format(number % 2),
+             'prices': {'students': 1.5 + number, 'others': None},
+             'notes': ['vegan'] * (number % 2)}
+            for number in range(1, 4)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super(StubHandler, self).setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        with server.lock:
+            server.requests.append(self.path)
+            server.active += 1
+            server.maxActive = max(server.maxActive, server.active)
+        try:
+            time.sleep(server.delay)
+            if self.path in server.redirects:
+                status, location = server.redirects[self.path]
+                return self.reply(status, {'location': location},
+                                  {'Location': location})
+            path = url.path[len('/api/v2/'):]
+            if path.startswith('canteens/'):
+                parts = path.split('/')
+                id = int(parts[1])
+                if id not in server.canteens:
+                    return self.reply(404, {'error': 'not found'})
+                if len(parts) == 2:
+                    return self.reply(200, server.canteens[id])
+                if parts[2:] == ['days']:
+                    return self.reply(200, days())
+                if len(parts) == 5 and parts[2] == 'days' and \
+                        parts[4] == 'meals':
+                    return self.replyChunked(meals(parts[3]))
+            if path == 'canteens':
+                query = parse_qs(url.query)
+                ids = [int(id) for id in query.get('ids', [''])[0].split(',')
+                       if id]
+                data = [server.canteens[id] for id in ids or server.canteens
+                        if id in server.canteens]
+                return self.reply(200, *self.paginate(data, query))
+            self.reply(404, {'error': 'not found'})
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def paginate(self, data, query):
+        perPage = int(query.get('limit', [self.server.perPage])[0] or 0)
+        if not perPage:
+            return data, {}
+        page = int(query.get('page', ['1'])[0])
+        pages = max(1, (len(data) + perPage - 1) // perPage)
+        headers = {'X-Total-Pages': str(pages)}
+        if self.server.currentPageHeader:
+            headers['X-Current-Page'] = str(page)
+        if self.server.linkHeader and page < pages:
+            query = dict((name, values[0]) for name, values in query.items())
+            query['page'] = page + 1
+            headers = {'Link': '<{0}?{1}>; rel="next"'.format(
+                self.path.split('?')[0], urlencode(sorted(query.items())))}
+        return data[(page - 1) * perPage:page * perPage], headers
+
+    def replyChunked(self, elements):
+        """ Sends a JSON array with chunked transfer encoding, one element
+            per chunk. If `hold` is set, the server waits for this event
+            after the first element. """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for index, element in enumerate(elements):
+            if index == 1 and self.server.hold is not None:
+                self.server.hold.wait(5)
+            data = ('[' if index == 0 else ',') + json.dumps(element)
+            self.writeChunk(data.encode('utf-8'))
+        self.writeChunk(b']' if elements else b'[]')
+        self.writeChunk(b'')
+
+    def writeChunk(self, data):
+        self.wfile.write('{0:x}\r\n'.format(len(data)).encode('ascii') +
+                         data + b'\r\n')
+
+    def reply(self, status, data, headers={}):
+        body = json.dumps(data).encode('utf-8')
+        etag = '"{0}"'.format(hashlib.sha1(body).hexdigest())
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            with self.server.lock:
+                self.server.notModified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status == 200:
+            self.send_header('ETag', etag)
+            if self.server.cacheControl:
+                self.send_header('Cache-Control', self.server.cacheControl)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, canteens=100, certfile=None):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubHandler)
+        scheme = 'http'
+        if certfile is not None:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+            scheme = 'https'
+        self.lock = threading.Lock()
+        self.canteens = dict((id, canteen(id))
+                             for id in range(1, canteens + 1))
+        self.delay = 0
+        self.connections = 0
+        self.requests = []
+        self.active = 0
+        self.maxActive = 0
+        self.notModified = 0
+        self.cacheControl = None
+        self.perPage = None
+        self.linkHeader = True
+        self.currentPageHeader = True
+        self.hold = None
+        #: request path -> (status, location) of redirected requests
+        self.redirects = {}
+        self.base = '{0}://127.0.0.1:{1}/api/v2/'.format(scheme,
+                                                        self.server_port)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever,
+                                       kwargs={'poll_interval': 0.05})
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,119 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+
+import pytest
+
+from pyopenmensa.api2 import AsyncCanteen, Canteen
+from pyopenmensa.asyncwrapper import ConnectionPool, HTTPError
+from pyopenmensa.wrapper import IdentityMap
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture(autouse=True)
+def identityMap(monkeypatch):
+    identityMap = IdentityMap()
+    monkeypatch.setattr(Canteen, 'identityMap', identityMap)
+    return identityMap
+
+
+def test_get_many_keeps_order(stub):
+    async def fetch():
+        async with AsyncCanteen(api_base=stub.base) as client:
+            return await client.getMany([5, 1, 3])
+    canteens = run(fetch())
+    assert [canteen.id for canteen in canteens] == [5, 1, 3]
+    assert all(isinstance(canteen, Canteen) for canteen in canteens)
+    assert canteens[0].name == 'Mensa 5'
+    assert canteens[0].address == 'Straße 5'
+    assert canteens[0].latitude == 52.005
+    assert canteens[0].api_base == stub.base
+
+
+def test_connections_are_reused(stub):
+    async def fetch():
+        async with AsyncCanteen(api_base=stub.base, limit=4) as client:
+            canteens = await client.getMany(range(1, 51))
+            return client.pool, canteens
+    pool, canteens = run(fetch())
+    assert len(canteens) == 50
+    assert stub.connections <= 4
+    assert pool.connections == stub.connections
+    assert pool.reused == 50 - pool.connections
+
+
+def test_per_host_limit(stub):
+    stub.delay = 0.02
+
+    async def fetch():
+        pool = ConnectionPool(limit=10, limitPerHost=3)
+        async with AsyncCanteen(api_base=stub.base, pool=pool) as client:
+            return await client.getMany(range(1, 13))
+    assert len(run(fetch())) == 12
+    assert 1 < stub.maxActive <= 3
+
+
+def test_http_errors(stub):
+    async def fetch():
+        async with AsyncCanteen(api_base=stub.base) as client:
+            return await client.get(1000)
+    with pytest.raises(HTTPError) as error:
+        run(fetch())
+    assert error.value.status == 404
+
+
+def test_redirects(stub):
+    stub.redirects['/api/v2/canteens/2'] = (301, '/api/v2/canteens/3')
+    stub.redirects['/api/v2/canteens/3'] = (307, stub.base + 'canteens/4')
+
+    async def fetch():
+        async with AsyncCanteen(api_base=stub.base) as client:
+            return await client.get(2)
+    assert run(fetch()).id == 4
+
+
+def test_redirect_errors(stub):
+    stub.redirects['/api/v2/canteens/2'] = (300, '/api/v2/canteens/3')
+    stub.redirects['/api/v2/canteens/5'] = (302, '/api/v2/canteens/5')
+
+    async def fetch(id):
+        async with AsyncCanteen(api_base=stub.base) as client:
+            return await client.get(id)
+    with pytest.raises(HTTPError) as error:
+        run(fetch(2))
+    assert error.value.status == 300
+    with pytest.raises(HTTPError) as error:
+        run(fetch(5))
+    assert error.value.status == 302
+    assert stub.requests.count('/api/v2/canteens/5') == \
+        ConnectionPool.maxRedirects + 1
+
+
+def test_identity_map(stub, identityMap):
+    async def fetch():
+        async with AsyncCanteen(api_base=stub.base) as client:
+            first = await client.get(2)
+            return first, await client.get(2), await client.getMany([2, 3, 2])
+    first, second, canteens = run(fetch())
+    assert first is second is canteens[0] is canteens[2]
+    assert canteens[1].id == 3
+    assert identityMap.peek(2) is first
+    assert stub.requests == ['/api/v2/canteens/2', '/api/v2/canteens/3']
+
+
+def test_identity_map_keeps_api_base(stub, identityMap):
+    canteen = Canteen(values={'id': 2, 'name': 'Alte Mensa'})
+    identityMap.add(2, canteen)
+
+    async def fetch():
+        async with AsyncCanteen(api_base=stub.base) as client:
+            return await client.getMany(range(1, 4)), \
+                client.create({'id': 2, 'name': 'Neue Mensa'})
+    canteens, created = run(fetch())
+    assert canteens[1] is created is canteen
+    assert canteen.name == 'Neue Mensa'
+    assert canteen.api_base == Canteen.default_api_base
+    assert canteens[0].api_base == stub.base
+    assert len(stub.requests) == 2
@@ -0,0 +1,77 @@
+# -*- coding: UTF-8 -*-
+import pytest
+
+from pyopenmensa.api2 import Canteen
+from pyopenmensa.wrapper import DiskResponseCache, ResponseCache
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def cache(request, tmpdir):
+    if request.param == 'disk':
+        return DiskResponseCache(str(tmpdir.join('responses')))
+    return ResponseCache()
+
+
+def entity(stub, cache):
+    entity = Canteen()
+    entity.api_base = stub.base
+    entity.cache = cache
+    return entity
+
+
+def test_fresh_responses_are_not_requested(stub, cache):
+    first = entity(stub, cache).request('canteens/2')
+    second = entity(stub, cache)
+    assert second.request('canteens/2') == first
+    assert second.response is None
+    assert len(stub.requests) == 1
+    assert cache.info() == (1, 1, 0, 1)
+
+
+def test_cache_is_keyed_by_url(stub, cache):
+    entity(stub, cache).request('canteens', {'ids': '1,2'})
+    entity(stub, cache).request('canteens', {'ids': '1,3'})
+    assert len(stub.requests) == 2
+    assert cache.info() == (0, 2, 0, 2)
+
+
+def test_stale_responses_are_revalidated(stub, cache):
+    cache.ttl = 0
+    first = entity(stub, cache).request('canteens/2')
+    second = entity(stub, cache)
+    content = second.request('canteens/2')
+    assert second.response.code == 304
+    assert stub.notModified == 1
+    assert cache.info() == (0, 1, 1, 1)
+    assert content == first
+    if not isinstance(cache, DiskResponseCache):
+        assert content is first  # decoded content is reused
+    stub.canteens[2] = dict(stub.canteens[2], name='Neue Mensa')
+    assert entity(stub, cache).request('canteens/2')['name'] == 'Neue Mensa'
+    assert cache.info() == (0, 2, 1, 1)
+
+
+def test_max_age_overrides_ttl(stub, cache):
+    cache.ttl = 3600
+    stub.cacheControl = 'max-age=0'
+    entity(stub, cache).request('canteens/2')
+    entity(stub, cache).request('canteens/2')
+    assert cache.info() == (0, 1, 1, 1)
+    stub.cacheControl = 'no-store'
+    cache.clear()
+    entity(stub, cache).request('canteens/2')
+    assert cache.info() == (0, 1, 0, 0)
+
+
+def test_default_cache(stub):
+    cache = ResponseCache(maxsize=1)
+    Canteen.default_cache = cache
+    try:
+        entity = Canteen()
+        assert entity.cache is cache
+        entity.api_base = stub.base
+        entity.request('canteens/1')
+        entity.request('canteens/2')
+        assert cache.size() == 1  # least recently used response is dropped
+    finally:
+        Canteen.default_cache = None
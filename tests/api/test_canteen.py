@@ -0,0 +1,223 @@
+# -*- coding: UTF-8 -*-
+from datetime import date
+import threading
+import time
+
+import pytest
+
+from pyopenmensa.api2 import Canteen, Meal
+from pyopenmensa.wrapper import IdentityMap, ResponseCache
+
+
+@pytest.fixture
+def api(stub, monkeypatch):
+    monkeypatch.setattr(Canteen, 'default_api_base', stub.base)
+    monkeypatch.setattr(Canteen, 'identityMap', IdentityMap())
+    return stub
+
+
+def test_find(api):
+    canteens = Canteen.find(ids=[3, 1])
+    assert [canteen.id for canteen in canteens] == [3, 1]
+    assert api.requests == ['/api/v2/canteens?ids=3%2C1']
+
+
+@pytest.mark.parametrize('linkHeader', [True, False])
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_iter_find_follows_pages(api, linkHeader, prefetch):
+    api.linkHeader = linkHeader
+    canteens = Canteen.iterFind(limit=30, prefetch=prefetch)
+    assert [canteen.id for canteen in canteens] == list(range(1, 101))
+    assert len(api.requests) == 4
+    assert api.requests[-1].endswith('page=4')
+
+
+def test_iter_find_without_current_page_header(api):
+    api.linkHeader = False
+    api.currentPageHeader = False
+    canteens = Canteen.iterFind(limit=30)
+    assert [canteen.id for canteen in canteens] == list(range(1, 101))
+    assert [request[-7:] for request in api.requests[1:]] == \
+        ['&page=2', '&page=3', '&page=4']
+
+
+def test_iter_find_is_lazy(api):
+    canteens = Canteen.iterFind(limit=10)
+    assert api.requests == []
+    assert next(canteens).id == 1
+    assert len(api.requests) == 1
+    assert [next(canteens).id for _ in range(10)][-1] == 11
+    assert len(api.requests) == 2
+
+
+def test_iter_find_prefetches_next_page(api):
+    canteens = Canteen.iterFind(limit=50, prefetch=True)
+    assert next(canteens).id == 1
+    for _ in range(100):
+        if len(api.requests) == 2:
+            break
+        time.sleep(0.01)
+    # second page is requested while the first one is consumed
+    assert len(api.requests) == 2
+    canteens.close()
+
+
+def test_iter_find_with_cached_pages(api, monkeypatch):
+    monkeypatch.setattr(Canteen, 'default_cache', ResponseCache())
+    assert len(list(Canteen.iterFind(limit=30))) == 100
+    assert len(list(Canteen.iterFind(limit=30))) == 100
+    assert len(api.requests) == 4
+
+
+def test_iter_find_without_pages(api):
+    assert len(list(Canteen.iterFind(ids=[1, 2, 3]))) == 3
+    assert len(api.requests) == 1
+
+
+def test_find_limit(api):
+    api.perPage = 30
+    assert [canteen.id for canteen in Canteen.find(limit=10)] == \
+        list(range(1, 11))
+    assert len(api.requests) == 1
+    canteens = Canteen.find(limit=10, ids=range(49, 0, -1))
+    assert [canteen.id for canteen in canteens] == list(range(49, 39, -1))
+
+
+def test_find_follows_pages(api):
+    api.perPage = 30
+    assert len(Canteen.find()) == 100
+    assert len(api.requests) == 4
+    Canteen.identityMap.invalidate()
+    assert len(Canteen.find(ids=range(1, 50))) == 49
+    assert len(api.requests) == 6
+
+
+def test_find_splits_large_id_lists(api, monkeypatch):
+    monkeypatch.setattr(Canteen, 'idsPerRequest', 30)
+    api.delay = 0.02
+    ids = list(range(100, 0, -1))
+    canteens = Canteen.find(ids=ids)
+    assert [canteen.id for canteen in canteens] == ids
+    assert len(api.requests) == 4
+    assert api.maxActive > 1  # chunks are requested concurrently
+    assert all(len(request) < 300 for request in api.requests)
+
+
+def test_find_dedupes_and_skips_unknown_ids(api):
+    canteens = Canteen.find(ids=[2, 1, 2, 1000, 1])
+    assert [canteen.id for canteen in canteens] == [2, 1]
+    assert api.requests == ['/api/v2/canteens?ids=2%2C1%2C1000']
+
+
+def test_find_skips_known_entities(api):
+    known = Canteen(values={'id': 2, 'name': 'Bekannt'})
+    entities = {2: known}
+    canteens = Canteen.find(ids=[1, 2, 3], entities=entities)
+    assert canteens[1] is known
+    assert api.requests == ['/api/v2/canteens?ids=1%2C3']
+    assert sorted(entities) == [1, 2, 3]
+    assert Canteen.find(ids=[3, 1], entities=entities) == \
+        [entities[3], entities[1]]
+    assert len(api.requests) == 1
+
+
+def test_days(api):
+    days = list(Canteen.find(ids=[1])[0].days())
+    assert [day.date for day in days] == \
+        [date(2013, 3, 4), date(2013, 3, 5), date(2013, 3, 6)]
+    assert [day.closed for day in days] == [False, True, False]
+
+
+def test_meals(api):
+    meals = list(Canteen.find(ids=[1])[0].meals(date(2013, 3, 4)))
+    assert api.requests[-1] == '/api/v2/canteens/1/days/2013-03-04/meals'
+    assert all(isinstance(meal, Meal) for meal in meals)
+    assert [meal.id for meal in meals] == [1, 2, 3]
+    assert meals[0].name == 'Gericht 1 am 2013-03-04'
+    assert meals[0].category == 'Essen 1'
+    assert meals[0].prices == {'students': 2.5, 'others': None}
+    assert meals[0].notes == ['vegan']
+    assert meals[1].notes == []
+
+
+def test_meals_are_decoded_while_receiving(api):
+    api.hold = threading.Event()
+    meals = Canteen.find(ids=[1])[0].meals('2013-03-04')
+    # the server sends the remaining meals after the first one is decoded
+    assert next(meals).id == 1
+    api.hold.set()
+    assert [meal.id for meal in meals] == [2, 3]
+
+
+def test_canteens_are_loaded_once(api):
+    canteen = Canteen(id=3)
+    assert Canteen(id=3) is canteen
+    assert Canteen(id='3') is canteen
+    assert len(api.requests) == 1
+    assert Canteen.identityMap.info() == (2, 1, 4096, 1)
+
+
+def test_find_populates_identity_map(api):
+    canteens = Canteen.find(ids=[1, 2])
+    assert Canteen(id=2) is canteens[1]
+    assert Canteen.find(ids=[2, 1]) == [canteens[1], canteens[0]]
+    assert list(Canteen.iterFind(ids=[1]))[0] is canteens[0]
+    assert len(api.requests) == 2
+
+
+def test_identity_map_updates_known_canteens(api):
+    canteen = Canteen(id=2)
+    api.canteens[2] = dict(api.canteens[2], name='Neue Mensa')
+    assert Canteen.find()[1] is canteen
+    assert canteen.name == 'Neue Mensa'
+
+
+def test_identity_map_invalidation(api):
+    canteen = Canteen(id=3)
+    Canteen.identityMap.invalidate(3)
+    assert Canteen(id=3) is not canteen
+    Canteen.identityMap.invalidate()
+    assert len(Canteen.identityMap) == 0
+    assert len(api.requests) == 2
+
+
+def test_identity_map_limits(api, monkeypatch):
+    monkeypatch.setattr(Canteen, 'identityMap', IdentityMap(maxsize=2,
+                                                            ttl=0))
+    Canteen(id=1)
+    Canteen(id=1)
+    assert len(api.requests) == 2  # expired immediately
+    Canteen.identityMap.ttl = None
+    Canteen.find(ids=[1, 2, 3])
+    assert 1 not in Canteen.identityMap
+    assert Canteen.identityMap.info().currsize == 2
+
+
+def test_identity_map_concurrent_invalidation():
+    import sys
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    identityMap = IdentityMap()
+    errors = []
+    done = threading.Event()
+
+    def invalidate():
+        while not done.is_set():
+            identityMap.add(1, 'canteen')
+            identityMap.invalidate(1)
+
+    thread = threading.Thread(target=invalidate)
+    thread.start()
+    try:
+        for _ in range(20000):
+            try:
+                assert identityMap.get(1) in (None, 'canteen')
+            except KeyError as error:
+                errors.append(error)
+            identityMap.info()
+    finally:
+        done.set()
+        thread.join()
+        sys.setswitchinterval(interval)
+    assert not errors
+    assert sum(identityMap.info()[:2]) == 20000
@@ -0,0 +1,122 @@
+# -*- coding: UTF-8 -*-
+from urllib.error import HTTPError
+import json
+
+import pytest
+
+from pyopenmensa.api2 import Canteen
+from pyopenmensa.wrapper import (Entity, MetricsAggregator, RequestObserver,
+                                 ResponseCache, endpointName)
+
+
+class Recorder(RequestObserver):
+    def __init__(self):
+        self.events = []
+
+    def requestStarted(self, entity, url):
+        self.events.append(('start', url))
+
+    def responseReceived(self, entity, metrics):
+        self.events.append(('response', metrics))
+
+    def requestFailed(self, entity, url, error):
+        self.events.append(('failed', error))
+
+
+@pytest.fixture
+def observers(monkeypatch):
+    observers = []
+    monkeypatch.setattr(Entity, 'observers', observers)
+    return observers
+
+
+def entity(stub, cache=None):
+    entity = Canteen(values={})
+    entity.api_base = stub.base
+    entity.cache = cache
+    return entity
+
+
+def test_request_phases(stub, observers):
+    recorder = Recorder()
+    observers.append(recorder)
+    entity(stub).request('canteens/2')
+    (start, url), (response, metrics) = recorder.events
+    assert start == 'start' and response == 'response'
+    assert url == metrics.url == stub.base + 'canteens/2'
+    assert metrics.endpoint == 'canteens/:id'
+    assert metrics.status == 200
+    assert metrics.cache is None
+    assert metrics.bytes == len(json.dumps(stub.canteens[2]).encode('utf-8'))
+    # utf-8 JSON is parsed without decode phase
+    assert list(metrics.timings) == ['url', 'connect', 'firstByte', 'read',
+                                     'parse', 'total']
+    assert metrics.timings['connect'] > 0
+    assert all(value >= 0 for value in metrics.timings.values())
+    assert metrics.timings['total'] >= sum(
+        value for phase, value in metrics.timings.items() if phase != 'total')
+
+
+def test_cached_requests(stub, observers):
+    recorder = Recorder()
+    observers.append(recorder)
+    cache = ResponseCache(ttl=0)
+    entity(stub, cache).request('canteens/2')
+    cache.ttl = 60
+    entity(stub, cache).request('canteens/2')
+    entity(stub, cache).request('canteens/2')
+    results = [(event[1].status, event[1].cache) for event in recorder.events
+               if event[0] == 'response']
+    assert results == [(200, 'miss'), (304, 'revalidated'), (None, 'hit')]
+
+
+def test_failed_requests(stub, observers):
+    recorder = Recorder()
+    observers.append(recorder)
+    with pytest.raises(HTTPError):
+        entity(stub).request('canteens/1000')
+    assert recorder.events[-1][0] == 'failed'
+    assert recorder.events[-1][1].code == 404
+
+
+def test_streamed_requests(stub, observers):
+    recorder = Recorder()
+    observers.append(recorder)
+    canteen = Canteen(values={'id': 1})
+    canteen.api_base = stub.base
+    assert len(list(canteen.meals('2013-03-04'))) == 3
+    metrics = recorder.events[-1][1]
+    assert metrics.endpoint == 'canteens/:id/days/:date/meals'
+    assert 'stream' in metrics.timings
+    assert metrics.bytes > 100
+
+
+def test_aggregator(stub, observers):
+    metrics = MetricsAggregator()
+    observers.append(metrics)
+    for id in range(1, 21):
+        entity(stub).request('canteens/{0}'.format(id))
+    entity(stub).request('canteens', {'ids': '1,2'})
+    with pytest.raises(HTTPError):
+        entity(stub).request('canteens/1000')
+    report = metrics.report()
+    assert sorted(report) == ['canteens', 'canteens/:id']
+    stats = report['canteens/:id']
+    assert stats.count == 20
+    assert 0 < stats.p50 <= stats.p95
+    assert stats.bytes > 20 * 50
+    assert metrics.report('parse')['canteens'].count == 1
+    assert metrics.failures == 1
+    metrics.clear()
+    assert metrics.report() == {}
+
+
+@pytest.mark.parametrize('url, endpoint', [
+    ('http://api/v2/canteens', 'canteens'),
+    ('http://api/v2/canteens/12?x=1', 'canteens/:id'),
+    ('http://api/v2/canteens/12/days/2013-03-04/meals',
+     'canteens/:id/days/:date/meals'),
+    ('http://other/path', '/path'),
+])
+def test_endpoint_names(url, endpoint):
+    assert endpointName('http://api/v2/', url) == endpoint
@@ -0,0 +1,61 @@
+# -*- coding: UTF-8 -*-
+from datetime import date
+
+import pytest
+
+from pyopenmensa.api2 import Api2Entity, Canteen, Day
+from pyopenmensa.fields import Field, IntegerField, StringField
+from pyopenmensa.wrapper import Entity
+
+
+class UpperField(Field):
+    def fromJsonDict(self, jsonDict):
+        return jsonDict.get(self.name, '').upper()
+
+
+class Sample(Api2Entity):
+    number = IntegerField(name='nr', default='7')
+    required = StringField(null=False)
+    raw = Field()
+    upper = UpperField()
+
+
+class ExtendedSample(Sample):
+    extra = IntegerField()
+
+
+def decode(model, values, generic=False):
+    entity = model.__new__(model)
+    if generic:
+        Entity.fromJsonDict(entity, values)
+    else:
+        entity.fromJsonDict(values)
+    return dict((name, getattr(entity, name)) for name in model._fields)
+
+
+@pytest.mark.parametrize('values', [
+    {},
+    {'nr': '3', 'required': 5, 'raw': [1], 'upper': 'abc'},
+    {'nr': None, 'required': None, 'raw': None},
+])
+def test_compiled_decoder_matches_fields(values):
+    assert decode(Sample, values) == decode(Sample, values, generic=True)
+    assert decode(ExtendedSample, dict(values, extra='4')) == \
+        decode(ExtendedSample, dict(values, extra='4'), generic=True)
+
+
+def test_compiled_decoder_converts():
+    assert decode(Sample, {'required': None}) == \
+        {'number': 7, 'required': 'None', 'raw': None, 'upper': ''}
+    assert decode(Day, {'date': '2013-03-04', 'closed': 0}) == \
+        {'date': date(2013, 3, 4), 'closed': False}
+
+
+def test_entities_use_slots():
+    canteen = Canteen(values={'id': 1, 'name': 'Mensa'})
+    assert not hasattr(canteen, '__dict__')
+    with pytest.raises(AttributeError):
+        canteen.unknown = True
+    extended = ExtendedSample()
+    extended.extra = 1
+    assert ExtendedSample.__slots__ == ('extra',)
@@ -0,0 +1,112 @@
+# -*- coding: UTF-8 -*-
+import io
+import json
+
+import pytest
+
+from pyopenmensa import wrapper
+from pyopenmensa.api2 import Canteen
+from pyopenmensa.wrapper import decodeContent, iterJsonArray, setJsonBackend
+
+
+def test_request_decodes_json(stub):
+    entity = Canteen()
+    entity.api_base = stub.base
+    assert entity.request('canteens/2') == stub.canteens[2]
+    assert entity.response.status == 200
+
+
+def test_url_encodes_params(stub):
+    entity = Canteen()
+    entity.api_base = stub.base
+    assert entity.url('canteens', {'ids': '1,2'}) == \
+        stub.base + 'canteens?ids=1%2C2'
+
+
+@pytest.mark.parametrize('chunkSize', [1, 2, 5, 1000])
+def test_iter_json_array(chunkSize):
+    data = ' [ {"name": "Gemüse", "notes": [1, 2]} , 12345, "x" ,{} ] '
+    elements = iterJsonArray(io.BytesIO(data.encode('utf-8')),
+                             chunkSize=chunkSize)
+    assert list(elements) == [{'name': 'Gemüse', 'notes': [1, 2]}, 12345,
+                              'x', {}]
+
+
+@pytest.mark.parametrize('chunkSize', [1, 2, 3, 4, 5, 7])
+@pytest.mark.parametrize('data, expected', [
+    ('[1.5, 22.25, 3e5]', [1.5, 22.25, 3e5]),
+    ('[-0.125,10E-2 ,7,-12.5e+3]', [-0.125, 0.1, 7, -12500.0]),
+    ('[123456789, [1.25, 2], 0.5]', [123456789, [1.25, 2], 0.5]),
+])
+def test_iter_json_array_numbers(chunkSize, data, expected):
+    elements = iterJsonArray(io.BytesIO(data.encode('utf-8')),
+                             chunkSize=chunkSize)
+    assert list(elements) == expected
+
+
+@pytest.mark.parametrize('data', [b'{}', b'[1, 2', b'[1 2]', b'[1,]',
+                                  b'[1,,2]', b'[{"a"', b'[1.]', b'[1.x]'])
+def test_iter_json_array_errors(data):
+    with pytest.raises(ValueError):
+        list(iterJsonArray(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize('contentType, body, expected', [
+    ('application/json; charset=utf-8', '{"a": "ä"}'.encode('utf-8'),
+     {'a': 'ä'}),
+    ('application/json; charset=UTF_8', b'[1]', [1]),
+    ('application/json; charset=iso-8859-1', '["ä"]'.encode('latin-1'),
+     ['ä']),
+    ('application/json', '"ä"'.encode('utf-16'), 'ä'),
+    ('text/plain; charset=utf-8', 'ä'.encode('utf-8'), 'ä'),
+    ('text/plain', b'raw', b'raw'),
+])
+def test_decode_content(contentType, body, expected):
+    assert decodeContent(contentType, body) == expected
+
+
+@pytest.fixture
+def backend():
+    yield
+    setJsonBackend('json')
+
+
+def test_json_backends(backend):
+    assert setJsonBackend('json') == 'json'
+    assert wrapper.loadJson is json.loads
+    selected = setJsonBackend('auto')
+    assert selected in wrapper.jsonBackends
+    assert decodeContent('application/json; charset=utf-8',
+                         '{"a": ["ä", 1.5]}'.encode('utf-8')) == \
+        {'a': ['ä', 1.5]}
+    with pytest.raises(ValueError):
+        setJsonBackend('simdjson')
+
+
+def test_https_requests(tlsStub, certificate, monkeypatch):
+    import ssl
+    from urllib.request import build_opener
+    context = ssl.create_default_context(cafile=certificate)
+    handlers = [handler(context=context)
+                if handler is wrapper.TimedHTTPSHandler else handler
+                for handler in wrapper.timedHandlers]
+    monkeypatch.setattr(wrapper.Entity, 'default_opener',
+                        build_opener(*handlers))
+    entity = Canteen()
+    entity.api_base = tlsStub.base
+    assert entity.request('canteens/2') == tlsStub.canteens[2]
+    assert wrapper.connectTimes.value > 0
+
+
+def test_redirect_to_https(stub, tlsStub):
+    from urllib.error import URLError
+    import ssl
+    stub.redirects['/api/v2/canteens/2'] = (301,
+                                            tlsStub.base + 'canteens/2')
+    entity = Canteen()
+    entity.api_base = stub.base
+    # the default opener follows the redirect and rejects the self-signed
+    # certificate
+    with pytest.raises(URLError) as error:
+        entity.request('canteens/2')
+    assert isinstance(error.value.reason, ssl.SSLError)
@@ -2,7 +2,7 @@
 import pytest
 from datetime import date
 
-from pyopenmensa.feed import BaseBuilder
+from pyopenmensa.feed import BaseBuilder, CompactMeal, InvalidMealsError
 
 
 @pytest.fixture
@@ -115,3 +115,344 @@ def test_support_of_custom_integers_as_price_value(canteen):
     canteen.addMeal(day, 'Hauptgericht', 'Essen', [],
                     {'student': CustomInt(12)})
     assert canteen.dayCount() == 1
+
+
+def test_compact_meal_storage():
+    canteen = BaseBuilder(compact=True)
+    day = date(2013, 3, 7)
+    canteen.addMeal(day, 'Hauptgericht', 'Gulasch', ['vegan'],
+                    {'student': 250, 'other': 400})
+    canteen.addMeal(day, 'Hauptgericht', 'Nudeln')
+    assert canteen.hasMealsFor(day)
+    meals = canteen._days[day]['Hauptgericht']
+    assert meals[0] == ('Gulasch', ['vegan'], {'student': 250, 'other': 400})
+    assert meals[1] == ('Nudeln', [], {})
+    name, notes, prices = meals[1]
+    assert (name, notes, prices) == ('Nudeln', [], {})
+
+
+def test_compact_meal_comparison():
+    canteen = BaseBuilder(compact=True)
+    canteen.addMeal(date(2013, 3, 7), 'Hauptgericht', 'Nudeln')
+    meal = canteen._days[date(2013, 3, 7)]['Hauptgericht'][0]
+    assert meal != 5
+    assert meal.__eq__(None) is NotImplemented
+    assert not meal == object()
+    assert meal != ('Nudeln', ['vegan'], {})
+    assert meal == ['Nudeln', [], {}]
+
+
+def test_compact_price_range():
+    canteen = BaseBuilder(compact=True)
+    day = date(2013, 3, 7)
+    for price in (2 ** 31, -2 ** 31):
+        with pytest.raises(ValueError):
+            canteen.addMeal(day, 'Hauptgericht', 'Gulasch', None,
+                            {'student': price})
+        with pytest.raises(InvalidMealsError):
+            canteen.addMeals([(day, 'Hauptgericht', 'Gulasch', None,
+                               {'student': price})])
+    assert not canteen.hasMealsFor(day)
+    canteen.addMeal(day, 'Hauptgericht', 'Gulasch', None,
+                    {'student': 2 ** 31 - 1})
+    big = BaseBuilder()
+    big.addMeal(day, 'Hauptgericht', 'Gulasch', None, {'student': 2 ** 40})
+    with pytest.raises(ValueError):
+        BaseBuilder(compact=True).merge(big)
+
+
+def test_compact_storage_shares_strings():
+    canteen = BaseBuilder(compact=True)
+    canteen.addMeal(date(2013, 3, 7), ''.join(['Haupt', 'gericht']), 'A',
+                    [''.join(['ve', 'gan'])])
+    canteen.addMeal(date(2013, 3, 8), ''.join(['Haupt', 'gericht']), 'B',
+                    [''.join(['ve', 'gan'])])
+    first, second = [canteen._days[date(2013, 3, day)] for day in (7, 8)]
+    assert list(first)[0] is list(second)[0]
+    assert first['Hauptgericht'][0].notes[0] is \
+        second['Hauptgericht'][0].notes[0]
+
+
+def test_add_meals(canteen):
+    day = date(2013, 3, 7)
+    canteen.addMeals([
+        (day, 'Hauptgericht', 'Gulasch'),
+        (day, 'Hauptgericht', 'Nudeln', ['vegan'], {'student': 250}),
+        {'date': date(2013, 3, 8), 'category': 'Beilagen', 'name': 'Reis'},
+    ])
+    assert canteen.dayCount() == 2
+    assert canteen._days[day]['Hauptgericht'] == [
+        ('Gulasch', [], {}), ('Nudeln', ['vegan'], {'student': 250})]
+    assert canteen._days[date(2013, 3, 8)]['Beilagen'] == [('Reis', [], {})]
+
+
+def test_add_meals_matches_add_meal(canteen):
+    other = BaseBuilder()
+    meals = [(date(2013, 3, 7 + i % 3), 'Kategorie {0}'.format(i % 2),
+              'Essen {0}'.format(i), [], {'other': i}) for i in range(20)]
+    for meal in meals:
+        other.addMeal(*meal)
+    canteen.addMeals(meals)
+    assert canteen.toXMLFeed() == other.toXMLFeed()
+
+
+def test_add_meals_reports_all_invalid_meals(canteen):
+    day = date(2013, 3, 7)
+    canteen.setDayClosed(date(2013, 3, 8))
+    with pytest.raises(InvalidMealsError) as excinfo:
+        canteen.addMeals([
+            (day, 'Hauptgericht', 'Gulasch'),
+            (day, 'Hauptgericht', ''),
+            (day, 'Hauptgericht', 'Essen', [], {'foobar': 12}),
+            (day, 'Hauptgericht', 'Essen', [], {'student': '12'}),
+            ('2013-03-07', 'Hauptgericht', 'Essen'),
+            (day, 'Hauptgericht'),
+            (date(2013, 3, 8), 'Hauptgericht', 'Essen'),
+            (date(2013, 3, 8), 'Beilagen', 'Reis'),
+            (day, 'Hauptgericht', 'Nudeln'),
+            (date(2013, 3, 8), 'Hauptgericht', 'Suppe'),
+        ])
+    errors = excinfo.value.errors
+    assert [index for index, error in errors] == [1, 2, 3, 4, 5, 6, 7, 9]
+    assert [type(error) for index, error in errors] == [
+        ValueError, ValueError, TypeError, TypeError, TypeError, ValueError,
+        ValueError, ValueError]
+    assert canteen.dayCount() == 1
+    assert not canteen.hasMealsFor(day)
+    with pytest.raises(ValueError):
+        canteen.addMeal(date(2013, 3, 8), 'Hauptgericht', 'Essen')
+    assert canteen._days[date(2013, 3, 8)] is False
+
+
+def fill_diff_canteen(canteen):
+    canteen.addMeal(date(2013, 3, 4), 'Essen', 'Gulasch', ['b', 'a'],
+                    {'student': 100, 'other': 200})
+    canteen.addMeal(date(2013, 3, 4), 'Essen', 'Nudeln')
+    canteen.addMeal(date(2013, 3, 4), 'Beilagen', 'Reis')
+    canteen.addMeal(date(2013, 3, 5), 'Essen', 'Suppe')
+    canteen.setDayClosed(date(2013, 3, 6))
+    canteen.addMeal(date(2013, 3, 7), 'Essen', 'Salat')
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_diff_equal_canteens(compact):
+    old, new = BaseBuilder(compact=compact), BaseBuilder()
+    fill_diff_canteen(old)
+    fill_diff_canteen(new)
+    # same meal with other order of notes and prices
+    new._days[date(2013, 3, 4)]['Essen'][0] = \
+        ('Gulasch', ['a', 'b'], {'other': 200, 'student': 100})
+    # empty categories are not part of the feed
+    new._days[date(2013, 3, 5)]['Leer'] = []
+    result = old.diff(new)
+    assert result == ([], [], [])
+    assert result.changedDates() == []
+
+
+def test_diff_days(canteen):
+    fill_diff_canteen(canteen)
+    new = BaseBuilder()
+    fill_diff_canteen(new)
+    new.clearDay(date(2013, 3, 5))
+    new.addMeal(date(2013, 3, 8), 'Essen', 'Pizza')
+    # closed day transitions
+    new.clearDay(date(2013, 3, 6))
+    new.addMeal(date(2013, 3, 6), 'Essen', 'Eintopf')
+    new.setDayClosed(date(2013, 3, 7))
+    result = canteen.diff(new)
+    assert result.addedDays == [date(2013, 3, 8)]
+    assert result.removedDays == [date(2013, 3, 5)]
+    assert result.modifiedDays == [
+        (date(2013, 3, 6), False, ['Essen'], [], []),
+        (date(2013, 3, 7), True, [], ['Essen'], []),
+    ]
+    assert result.changedDates() == [date(2013, 3, 5), date(2013, 3, 6),
+                                      date(2013, 3, 7), date(2013, 3, 8)]
+
+
+def test_diff_categories_and_meals(canteen):
+    fill_diff_canteen(canteen)
+    new = BaseBuilder()
+    fill_diff_canteen(new)
+    day = date(2013, 3, 4)
+    del new._days[day]['Beilagen']
+    new.addMeal(day, 'Dessert', 'Pudding')
+    new._days[day]['Essen'][0] = ('Gulasch', ['a', 'b'],
+                                  {'student': 120, 'other': 200})
+    new.addMeal(day, 'Essen', 'Pizza', ['c'])
+    new._days[day]['Essen'].remove(('Nudeln', [], {}))
+    new.addMeal(date(2013, 3, 5), 'Essen', 'Suppe')
+    result = canteen.diff(new)
+    assert result.addedDays == result.removedDays == []
+    gulasch = ('Gulasch', ['a', 'b'], {'student': 100, 'other': 200})
+    assert result.modifiedDays == [
+        (day, None, ['Dessert'], ['Beilagen'], [
+            ('Essen', [('Pizza', ['c'], {})], [('Nudeln', [], {})],
+             [(gulasch, ('Gulasch', ['a', 'b'],
+                         {'student': 120, 'other': 200}))]),
+        ]),
+        (date(2013, 3, 5), None, [], [], [
+            ('Essen', [('Suppe', [], {})], [], []),
+        ]),
+    ]
+
+
+def test_diff_reordered_meals(canteen):
+    fill_diff_canteen(canteen)
+    new = BaseBuilder()
+    fill_diff_canteen(new)
+    new._days[date(2013, 3, 4)]['Essen'].reverse()
+    result = canteen.diff(new)
+    assert result.modifiedDays == [
+        (date(2013, 3, 4), None, [], [], [('Essen', [], [], [])])]
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_fingerprints(compact):
+    old, new = BaseBuilder(), BaseBuilder(compact=compact)
+    fill_diff_canteen(old)
+    fill_diff_canteen(new)
+    new._days[date(2013, 3, 4)]['Essen'][0] = \
+        ('Gulasch', ['a', 'b'], {'other': 200, 'student': 100})
+    new.clearXMLCache()
+    assert new.fingerprint() == old.fingerprint()
+    assert new.dayFingerprint(date(2013, 3, 4)) == \
+        old.dayFingerprint(date(2013, 3, 4))
+    assert new.dayFingerprint(date(2013, 3, 6)) != \
+        new.dayFingerprint(date(2013, 3, 5))
+    assert new.dayFingerprint(date(2013, 3, 9)) is None
+    # stable across processes and python versions
+    assert new.dayFingerprint(date(2013, 3, 6)) == \
+        'ea88fbaa99b73225752e2ef67593f775848160ad'
+    new.addMeal(date(2013, 3, 8), 'Essen', 'Suppe', ['b', 'a'],
+                {'student': 100})
+    assert new.dayFingerprint(date(2013, 3, 8)) == \
+        'bd3173fc760d7f0f81149173a0d087ebd2f6fadf'
+
+
+def test_fingerprints_follow_changes(canteen):
+    fill_diff_canteen(canteen)
+    fingerprint = canteen.fingerprint()
+    day = canteen.dayFingerprint(date(2013, 3, 5))
+    other = canteen.dayFingerprint(date(2013, 3, 4))
+    canteen.addMeal(date(2013, 3, 5), 'Essen', 'Salat')
+    assert canteen.dayFingerprint(date(2013, 3, 5)) != day
+    assert canteen.dayFingerprint(date(2013, 3, 4)) == other
+    assert canteen.fingerprint() != fingerprint
+    canteen.clearDay(date(2013, 3, 5))
+    assert canteen.dayFingerprint(date(2013, 3, 5)) is None
+    canteen.addMeal(date(2013, 3, 5), 'Essen', 'Suppe')
+    assert canteen.dayFingerprint(date(2013, 3, 5)) == day
+    assert canteen.fingerprint() == fingerprint
+    canteen.setDayClosed(date(2013, 3, 5))
+    assert canteen.fingerprint() != fingerprint
+    canteen.clearDay(date(2013, 3, 5))
+    canteen.addMeal(date(2013, 3, 5), 'Essen', 'Suppe')
+    canteen.name = 'Mensa'
+    assert canteen.fingerprint() != fingerprint
+    canteen.name = None
+    canteen.define(name='today', priority=1, url='http://example.org',
+                   source=None, dayOfWeek='*', dayOfMonth='*', hour='8',
+                   minute='0', retry=None)
+    assert canteen.fingerprint() != fingerprint
+
+
+def merge_sources(compact=False):
+    menus = BaseBuilder(compact=compact)
+    menus.name = 'Mensa'
+    menus.addMeal(date(2013, 3, 4), 'Essen', 'Gulasch', ['Rind'])
+    menus.addMeal(date(2013, 3, 4), 'Essen', 'Nudeln', ['vegan'])
+    menus.addMeal(date(2013, 3, 5), 'Essen', 'Suppe')
+    menus.setDayClosed(date(2013, 3, 6))
+    prices = BaseBuilder()
+    prices.city = 'Berlin'
+    prices.addMeal(date(2013, 3, 4), 'Essen', 'Gulasch', ['scharf'],
+                   {'student': 250})
+    prices.addMeal(date(2013, 3, 4), 'Beilagen', 'Reis', None,
+                   {'student': 50})
+    prices.addMeal(date(2013, 3, 6), 'Essen', 'Eintopf')
+    closed = BaseBuilder(compact=True)
+    closed.setDayClosed(date(2013, 3, 5))
+    closed.addMeal(date(2013, 3, 7), 'Essen', 'Salat')
+    return menus, prices, closed
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_merge_prefer_newest(compact):
+    menus, prices, closed = merge_sources(compact)
+    assert menus.merge(prices, closed) is menus
+    assert menus.name == 'Mensa'
+    assert menus.city == 'Berlin'
+    assert menus._days == {
+        date(2013, 3, 4): {
+            'Essen': [('Gulasch', ['scharf'], {'student': 250}),
+                      ('Nudeln', ['vegan'], {})],
+            'Beilagen': [('Reis', [], {'student': 50})]},
+        date(2013, 3, 5): False,
+        date(2013, 3, 6): {'Essen': [('Eintopf', [], {})]},
+        date(2013, 3, 7): {'Essen': [('Salat', [], {})]},
+    }
+    if compact:
+        assert all(isinstance(meal, CompactMeal)
+                   for day in menus._days.values() if day
+                   for meals in day.values() for meal in meals)
+    else:
+        assert not isinstance(menus._days[date(2013, 3, 7)]['Essen'][0],
+                              CompactMeal)
+    # the merged builders are not modified
+    assert list(prices._days[date(2013, 3, 4)]) == ['Essen', 'Beilagen']
+    assert closed._days[date(2013, 3, 5)] is False
+
+
+def test_merge_union_notes():
+    menus, prices, closed = merge_sources()
+    menus.merge(prices, strategy='union-notes')
+    assert menus._days[date(2013, 3, 4)]['Essen'] == [
+        ('Gulasch', ['Rind', 'scharf'], {'student': 250}),
+        ('Nudeln', ['vegan'], {})]
+    menus, prices, closed = merge_sources()
+    prices.merge(menus, strategy='union-notes')
+    assert prices._days[date(2013, 3, 4)]['Essen'][0] == \
+        ('Gulasch', ['scharf', 'Rind'], {'student': 250})
+    assert prices._days[date(2013, 3, 6)] is False
+
+
+def test_merge_prefer_closed():
+    menus, prices, closed = merge_sources()
+    menus.merge(prices, closed, strategy='prefer-closed')
+    assert menus._days[date(2013, 3, 5)] is False
+    assert menus._days[date(2013, 3, 6)] is False
+
+
+def test_merge_updates_caches(canteen):
+    canteen.cacheXML = True
+    canteen.addMeal(date(2013, 3, 4), 'Essen', 'Gulasch')
+    canteen.toXMLFeed()
+    fingerprint = canteen.fingerprint()
+    other = BaseBuilder()
+    other.addMeal(date(2013, 3, 4), 'Essen', 'Nudeln')
+    canteen.merge(other)
+    assert 'Nudeln' in canteen.toXMLFeed()
+    assert canteen.fingerprint() != fingerprint
+
+
+def test_merge_strategy_errors(canteen):
+    with pytest.raises(ValueError):
+        canteen.merge(BaseBuilder(), strategy='prefer-oldest')
+    with pytest.raises(TypeError):
+        canteen.merge(BaseBuilder(), stratgy='union-notes')
+
+
+@pytest.mark.parametrize('strategy', BaseBuilder.merge_strategies)
+def test_merge_keeps_meals_with_same_name(canteen, strategy):
+    day = date(2013, 3, 4)
+    canteen.addMeal(day, 'Essen', 'Salat', None, {'student': 200})
+    canteen.addMeal(day, 'Essen', 'Suppe')
+    other = BaseBuilder()
+    other.addMeal(day, 'Essen', 'Salat', None, {'student': 250})
+    other.addMeal(day, 'Essen', 'Salat', None, {'student': 350})
+    canteen.merge(other, strategy=strategy)
+    assert canteen._days[day]['Essen'] == [
+        ('Salat', [], {'student': 250}), ('Suppe', [], {}),
+        ('Salat', [], {'student': 350})]
+    assert BaseBuilder().merge(other)._days == other._days
@@ -2,7 +2,8 @@
 from datetime import date
 import pytest
 
-from pyopenmensa.feed import extractDate
+from pyopenmensa import feed
+from pyopenmensa.feed import date_cache, extractDate
 
 
 class TestExtractDateFormats():
@@ -122,3 +123,74 @@ class TestExtractDateFormats():
     def test_unknown_date_format(self):
         with pytest.raises(ValueError):
             extractDate('2050.11-24')
+
+
+class TestDateCache():
+
+    def setup_method(self, method):
+        date_cache.clear()
+
+    def teardown_method(self, method):
+        date_cache.resize(256)
+
+    def test_repeated_dates_are_cached(self):
+        assert extractDate('Montag, 07.03.2013') == date(2013, 3, 7)
+        assert extractDate('Montag, 07.03.2013') == date(2013, 3, 7)
+        info = date_cache.info()
+        assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                extractDate('2050.11-24')
+        assert date_cache.info().currsize == 0
+
+    def test_bounded_size(self):
+        date_cache.resize(2)
+        extractDate('07.03.2013')
+        extractDate('08.03.2013')
+        extractDate('07.03.2013')
+        extractDate('09.03.2013')
+        assert date_cache.info().currsize == 2
+        assert date_cache.get('07.03.2013') == date(2013, 3, 7)
+        assert date_cache.get('08.03.2013') is None
+
+    def test_disabled_cache(self):
+        date_cache.resize(0)
+        assert extractDate('07.03.2013') == date(2013, 3, 7)
+        assert date_cache.info().currsize == 0
+
+    def test_thread_safety(self):
+        import threading
+        date_cache.resize(5)
+        texts = ['{0:02}.03.2013'.format(day) for day in range(1, 29)]
+        failures = []
+
+        def convert():
+            for _ in range(20):
+                for day, text in enumerate(texts, 1):
+                    if extractDate(text) != date(2013, 3, day):
+                        failures.append(text)
+        threads = [threading.Thread(target=convert) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert failures == []
+        info = date_cache.info()
+        assert info.hits + info.misses == 4 * 20 * len(texts)
+        assert info.currsize == 5
+
+
+@pytest.mark.parametrize('text', [
+    '2013-03-07', '13-3-7', ' 2013-03-07 ', '07.03.2013', '7.3.13',
+    '2013-03-45', '2013-23-07', '45.03.2013', '07.13.2013', '07.03.201',
+    '2013-03-07-12', '1.2.3.4', 'Montag, 07.03.2013',
+])
+def test_fast_paths_match_regex(text):
+    def outcome(parse):
+        try:
+            return parse(text)
+        except ValueError:
+            return ValueError
+    assert outcome(feed._parseDate) == outcome(feed._searchDate)
@@ -4,7 +4,7 @@ import re
 
 import pytest
 
-from pyopenmensa.feed import LazyBuilder
+from pyopenmensa.feed import LazyBuilder, buildLegend
 
 
 @pytest.fixture
@@ -58,3 +58,55 @@ def test_notes_regex(canteen):
     canteen.setLegendData(legend={'2': 'Found Note'})
     canteen.addMeal(day, 'Test', '_2_: Essen _a_, _2,2_, (2)')
     assert canteen._days[day]['Test'][0] == ('Essen _a_, _2,2_, (2)', ['Found Note'], {})
+
+
+def test_add_meals(canteen):
+    canteen.setLegendData(legend={'1': 'Schwein'})
+    canteen.setAdditionalCharges('student', {'other': 100})
+    canteen.addMeals([
+        ('07.03.2013', 'Test', 'Gulasch (1)', None, '2,50 €'),
+        {'date': '2013-03-07', 'category': 'Test', 'name': 'Y' * 251,
+         'prices': ['1,00', '2,00'], 'roles': ('pupil', 'employee')},
+    ])
+    assert canteen._days[date(2013, 3, 7)]['Test'] == [
+        ('Gulasch', ['Schwein'], {'student': 250, 'other': 350}),
+        ('Y' * 247 + '...', [], {'pupil': 100, 'employee': 200})]
+
+
+def test_add_meals_reports_conversion_errors(canteen):
+    with pytest.raises(ValueError) as excinfo:
+        canteen.addMeals([
+            ('07.03.2013', 'Test', 'Gulasch', [], {'student': 'gratis'}),
+            ('kein Datum', 'Test', 'Gulasch'),
+        ])
+    assert [index for index, error in excinfo.value.errors] == [0, 1]
+    assert canteen.dayCount() == 0
+
+
+def test_changed_notes_regex_after_legend(canteen):
+    day = date(2013, 3, 7)
+    canteen.setLegendData(legend={'2': 'Found Note'})
+    canteen.addMeal(day, 'Test', 'Essen (2)')
+    canteen.extra_regex = re.compile('_([0-9]{1,3})_', re.UNICODE)
+    canteen.addMeal(day, 'Test', 'Essen _2_')
+    assert canteen._days[day]['Test'] == [('Essen', ['Found Note'], {}),
+                                          ('Essen', ['Found Note'], {})]
+
+
+def test_extended_legend(canteen, capsys):
+    day = date(2013, 3, 7)
+    canteen.setLegendData(legend={'1': 'Schwein'})
+    canteen.addMeal(day, 'Test', 'Gulasch (1,2)')
+    assert 'could not find extra note "2"' in capsys.readouterr()[0]
+    buildLegend(canteen.legendData, '2) Konservierung')
+    canteen.addMeal(day, 'Test', 'Gulasch (1,2)')
+    canteen.legendData['1'] = 'Rind'
+    canteen.addMeal(day, 'Test', 'Gulasch (1,2)')
+    del canteen.legendData['2']
+    canteen.addMeal(day, 'Test', 'Gulasch (1,2)')
+    assert canteen._days[day]['Test'] == [
+        ('Gulasch', ['Schwein'], {}),
+        ('Gulasch', ['Schwein', 'Konservierung'], {}),
+        ('Gulasch', ['Rind', 'Konservierung'], {}),
+        ('Gulasch', ['Rind'], {})]
+    assert capsys.readouterr()[0].count('could not find') == 1
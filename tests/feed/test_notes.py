@@ -1,5 +1,8 @@
 # -*- coding: UTF-8 -*-
-from pyopenmensa.feed import buildLegend, extractNotes
+import re
+
+from pyopenmensa.feed import Legend, buildLegend, compilePattern, \
+    default_legend_regex, extractNotes, pattern_cache
 
 
 class TestLegendBuilding():
@@ -59,3 +62,61 @@ class TestNoteExtraction():
         name2, notes = extractNotes(name, [], legend=self.legend)
         assert name2 == 'Gulash with Hanswurst'
         assert notes == ['Schwein', 'Farbstoff']
+
+
+class TestLegend():
+    legend = {'1': 'Schwein', 'a': 'Farbstoff'}
+    names = [
+        'Gulash mit Hanswurst',
+        'Gulash (1) with Hanswurst',
+        'Gulash (1) with Hanswurst (a)',
+        'Gulash (1,a) with Hanswurst',
+        'Gulash (1) with Hanswurst (1,a)',
+        'Gulash (1,x)\xa0with (b) Hanswurst',
+    ]
+
+    def test_matches_extract_notes(self):
+        legend = Legend(self.legend)
+        for name in self.names:
+            assert legend.extract(name, ['Schwein']) == \
+                extractNotes(name, ['Schwein'], legend=self.legend)
+
+    def test_repeated_extraction(self):
+        legend = Legend(self.legend)
+        for _ in range(2):
+            assert legend.extract('Gulash (1,a) with Hanswurst', []) == \
+                ('Gulash with Hanswurst', ['Schwein', 'Farbstoff'])
+
+    def test_custom_regex_and_key(self):
+        regex = re.compile('_([0-9A-Z]{1,3})_(?:: +)?', re.UNICODE)
+        legend = Legend({'2a': 'Found Note'}, regex=regex,
+                        key=lambda v: v.lower())
+        assert legend.extract('_2A_: Essen _a_, (2)', []) == \
+            ('Essen _a_, (2)', ['Found Note'])
+
+
+class TestPatternRegistry():
+
+    def setup_method(self, method):
+        pattern_cache.clear()
+
+    def test_compiled_once(self):
+        text = '1) Schwein a)Farbstoff'
+        for _ in range(3):
+            buildLegend({}, text=text)
+        info = pattern_cache.info()
+        assert (info.misses, info.hits) == (1, 2)
+
+    def test_compiled_legend_regex(self):
+        regex = re.compile(default_legend_regex, re.UNICODE)
+        assert buildLegend({}, text='1) Schwein', regex=regex) == \
+            {'1': 'Schwein'}
+        assert pattern_cache.info().misses == 0
+
+    def test_shared_with_extract_notes(self):
+        regex = r'\[(\d)\]'
+        name, notes = extractNotes('Gulash [1]', [], legend={'1': 'Schwein'},
+                                   regex=regex)
+        assert (name, notes) == ('Gulash', ['Schwein'])
+        assert compilePattern(regex) is compilePattern(regex)
+        assert pattern_cache.info().misses == 1
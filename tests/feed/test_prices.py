@@ -2,7 +2,8 @@
 import pytest
 import re
 
-from pyopenmensa.feed import convertPrice, buildPrices
+from pyopenmensa.feed import convertPrice, convertPrices, buildPrices, \
+    price_cache
 
 
 class TestPriceConverting():
@@ -214,3 +215,79 @@ class TestPriceDictBuilding():
             buildPrices(True)
         with pytest.raises(TypeError):
             buildPrices(None)
+
+
+class TestPriceColumnConverting():
+    column = ['3,04 €', 304, 3.04, '-', '2,50 €', '3,04 €', ' -  ', '4€',
+              '2,50 €']
+
+    def test_matches_convert_price(self):
+        assert convertPrices(self.column) == \
+            [convertPrice(value) for value in self.column]
+
+    def test_custom_regex(self):
+        none_regex = re.compile(r'[Kk]eine.*')
+        assert convertPrices(['Keine', '3,04'], none_regex=none_regex) == \
+            [None, 304]
+
+    def test_distinct_strings(self):
+        column = ['{0},{1:02} €'.format(euro, euro % 100)
+                  for euro in range(300)] + ['12 €', '1.5 €', '-']
+        assert convertPrices(column) == \
+            [convertPrice(value) for value in column]
+
+    def test_regex_without_cents(self):
+        regex = re.compile(r'(?P<euro>\d+) Euro')
+        assert convertPrices(['3 Euro', 4, '5 €'], regex=regex) == \
+            [300, 4, 500]
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            convertPrices(['3,04 €', '34,3,3 €'])
+        with pytest.raises(TypeError):
+            convertPrices([304, None])
+
+    def test_masked_array(self):
+        numpy = pytest.importorskip('numpy')
+        prices = convertPrices(self.column, masked=True)
+        assert prices.dtype == numpy.int64
+        assert list(prices.mask) == [value is None for value in
+                                     convertPrices(self.column)]
+        assert prices.filled(-1).tolist() == \
+            [-1 if value is None else value
+             for value in convertPrices(self.column)]
+
+
+class TestPriceCache():
+
+    def setup_method(self, method):
+        price_cache.resize(16)
+
+    def teardown_method(self, method):
+        price_cache.resize(0)
+        price_cache.clear()
+
+    def test_disabled_by_default(self):
+        price_cache.resize(0)
+        assert convertPrice('3,04 €') == 304
+        assert price_cache.info() == (0, 0, 0, 0)
+
+    def test_repeated_prices(self):
+        assert convertPrice('3,04 €') == 304
+        assert convertPrice('3,04 €') == 304
+        assert price_cache.info() == (1, 1, 16, 1)
+
+    def test_none_prices_are_cached(self):
+        assert convertPrice('-') is None
+        assert convertPrice('-') is None
+        assert price_cache.info().hits == 1
+
+    def test_regexes_are_part_of_the_key(self):
+        none_regex = re.compile(r'[Kk]eine.*')
+        assert convertPrice('Keine', none_regex=none_regex) is None
+        with pytest.raises(ValueError):
+            convertPrice('Keine')
+
+    def test_used_by_build_prices(self):
+        buildPrices(['3.64€', '3.64€'], ('student', 'other'))
+        assert price_cache.info().hits == 1
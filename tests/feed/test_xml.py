@@ -1,18 +1,21 @@
 # -*- coding: UTF-8 -*-
 from datetime import date
+from io import BytesIO
 from xml.etree.ElementTree import fromstring as parse
 
 import pytest
 
-from pyopenmensa.feed import BaseBuilder, LazyBuilder
+from pyopenmensa.feed import BaseBuilder, LazyBuilder, renderFeeds
 
 PARSER_VERSION = "1.0.3a"
 
 
-@pytest.fixture(params=['base', 'lazy'])
+@pytest.fixture(params=['base', 'lazy', 'compact'])
 def canteen(request):
     if request.param == 'base':
         builder = BaseBuilder()
+    elif request.param == 'compact':
+        builder = LazyBuilder(compact=True)
     else:
         builder = LazyBuilder()
 
@@ -196,3 +199,320 @@ def test_prices_are_alphabetically_ordered(canteen):
             assert list(element.attrib.keys()) == ['role']
             xml_prices.append((element.attrib['role'], element.text.strip()))
     assert xml_prices == [('other', '0.09'), ('student', '9.40')]
+
+
+def dom_feed(canteen):
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + \
+        canteen.toXML().toprettyxml(indent='  ')
+
+
+def test_empty_feed_matches_dom(canteen):
+    assert canteen.toXMLFeed() == dom_feed(canteen)
+
+
+def fill_full_feed(canteen):
+    canteen.name = 'Mensa <Süd> & "Nord"'
+    canteen.address = 'Hauptstraße 1'
+    canteen.city = 'Berlin'
+    canteen.email = 'mensa@example.org'
+    canteen.location('13.40', '52.52')
+    canteen.availability = 'public'
+    canteen.define(name='today', priority=1, url='http://example.org/?a=1&b=2',
+                   source=None, dayOfWeek='*', dayOfMonth='*', hour='8-14',
+                   minute='0', retry=None)
+    canteen.define(name='full', priority=0, url='http://example.org/full',
+                   source='http://example.org/src', dayOfWeek='0',
+                   dayOfMonth='*', hour='8', minute='0', retry='30 1')
+    canteen.setDayClosed(date(2013, 10, 14))
+    canteen.addMeal(date(2013, 10, 13), 'Haupt & Neben', 'Gulasch <scharf>',
+                    ['vegan', 'a "b"'], {'student': 940, 'other': 9})
+    canteen.addMeal(date(2013, 10, 13), 'Haupt & Neben', 'Nudeln')
+    canteen.addMeal(date(2013, 10, 12), 'Beilagen', 'Reis', prices={'pupil': 5})
+
+
+def test_full_feed_matches_dom(canteen):
+    fill_full_feed(canteen)
+    assert canteen.toXMLFeed() == dom_feed(canteen)
+
+
+def test_feed_escaping_matches_dom(canteen):
+    canteen.addMeal(date(2013, 10, 13), 'a "b"\n\tc\r', 'Gulasch "scharf"',
+                    ['<1> & "2"'])
+    assert canteen.toXMLFeed() == dom_feed(canteen)
+
+
+def test_escaping_follows_minidom(monkeypatch):
+    from xml.dom import minidom
+    from pyopenmensa import feed
+
+    def write_data(writer, data, attr=False):
+        data = data.replace('&', '&amp;').replace('<', '&lt;') \
+            .replace('>', '&gt;')
+        if attr:
+            data = data.replace('"', '&quot;').replace('\n', '&#10;')
+        writer.write(data)
+
+    monkeypatch.setattr(minidom, '_write_data', write_data)
+    escapes = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'))
+    assert feed._minidomEscapes(False) == escapes
+    # minidom passes `attr` for attribute values since python 3.13 only
+    assert feed._minidomEscapes(True) in (
+        escapes, escapes + (('"', '&quot;'), ('\n', '&#10;')))
+
+
+def test_feed_stream(canteen):
+    from io import StringIO
+    canteen.addMeal(date(2013, 10, 13), 'Hauptgerichte', 'Gulasch')
+    canteen.setDayClosed(date(2013, 10, 14))
+    stream = StringIO()
+    assert canteen.toXMLFeed(stream=stream) is None
+    assert stream.getvalue() == dom_feed(canteen)
+
+
+def test_feed_chunks_per_day(canteen):
+    for day in range(1, 11):
+        canteen.setDayClosed(date(2013, 10, day))
+    # header, root, version, canteen start, ten days, canteen end, root end
+    assert len(list(canteen.iterXMLFeed())) == 16
+
+
+def test_xml_cache_disabled_by_default(canteen):
+    canteen.setDayClosed(date(2013, 10, 14))
+    canteen.toXMLFeed()
+    assert canteen.xmlCacheInfo() == (0, 0, None, 0)
+
+
+def test_xml_cache_reuses_unchanged_days(canteen):
+    canteen.cacheXML = True
+    canteen.addMeal(date(2013, 10, 13), 'Hauptgerichte', 'Gulasch')
+    canteen.setDayClosed(date(2013, 10, 14))
+    canteen.addMeal(date(2013, 10, 15), 'Hauptgerichte', 'Nudeln')
+    first = canteen.toXMLFeed()
+    assert canteen.xmlCacheInfo() == (0, 3, None, 3)
+    assert canteen.toXMLFeed() == first
+    assert canteen.xmlCacheInfo() == (3, 3, None, 3)
+
+
+def test_xml_cache_invalidation(canteen):
+    canteen.cacheXML = True
+    canteen.addMeal(date(2013, 10, 13), 'Hauptgerichte', 'Gulasch')
+    canteen.setDayClosed(date(2013, 10, 14))
+    canteen.addMeal(date(2013, 10, 15), 'Hauptgerichte', 'Nudeln')
+    canteen.toXMLFeed()
+    canteen.addMeal(date(2013, 10, 13), 'Hauptgerichte', 'Reis')
+    canteen.setDayClosed(date(2013, 10, 15))
+    canteen.clearDay(date(2013, 10, 14))
+    assert canteen.toXMLFeed() == dom_feed(canteen)
+    assert canteen.xmlCacheInfo() == (0, 5, None, 2)
+    canteen.clearXMLCache()
+    assert canteen.xmlCacheInfo() == (0, 0, None, 0)
+
+
+def fill_canteens(count):
+    canteens = []
+    for number in range(count):
+        canteen = LazyBuilder(compact=number % 2 == 1)
+        canteen.version = PARSER_VERSION
+        canteen.name = 'Mensa {0}'.format(number)
+        canteen.define(name='today', priority=0, url='http://example.org/',
+                       source=None, dayOfWeek='*', dayOfMonth='*',
+                       hour='8-14', minute='0', retry=None)
+        canteen.setLegendData(legend={'1': 'Schwein'})
+        canteen.setAdditionalCharges('student', {'other': 150})
+        canteen.setDayClosed('14.10.2013')
+        canteen.addMeal('13.10.2013', 'Essen', 'Gulasch (1)', ['a & b'],
+                        '{0},50 €'.format(number))
+        canteen.addMeal('15.10.2013', 'Essen', 'Nudeln')
+        canteens.append(canteen)
+    return canteens
+
+
+@pytest.mark.parametrize('mode', ['process', 'thread'])
+def test_render_feeds_matches_serial(mode):
+    canteens = fill_canteens(5)
+    results = renderFeeds(canteens, workers=2, mode=mode)
+    assert [result.xml for result in results] == \
+        [canteen.toXMLFeed() for canteen in canteens]
+    assert all(result.path is None and result.seconds >= 0
+               for result in results)
+
+
+def test_render_feeds_to_paths(tmpdir):
+    canteens = fill_canteens(3)
+    paths = [str(tmpdir.join('{0}.xml'.format(i))) for i in range(3)]
+    results = renderFeeds(canteens, workers=2, paths=paths)
+    assert [result.path for result in results] == paths
+    assert [result.xml for result in results] == [None] * 3
+    for canteen, path in zip(canteens, paths):
+        with open(path, 'rb') as stream:
+            assert stream.read().decode('utf-8') == canteen.toXMLFeed()
+
+
+def test_render_feeds_serial_and_errors():
+    canteens = fill_canteens(2)
+    assert [result.xml for result in renderFeeds(canteens, workers=1)] == \
+        [canteen.toXMLFeed() for canteen in canteens]
+    with pytest.raises(ValueError):
+        renderFeeds(canteens, mode='cluster')
+    with pytest.raises(ValueError):
+        renderFeeds(canteens, paths=['only-one.xml'])
+
+
+def test_read_feed_round_trip(canteen):
+    fill_full_feed(canteen)
+    canteen.addMeal(date(2013, 10, 15), 'Essen', 'Suppe', ['z', 'b'],
+                    {'student': 5, 'employee': 100, 'other': 12345})
+    canteen._days[date(2013, 10, 16)] = {}
+    feed = canteen.toXMLFeed()
+    parsed = type(canteen).fromXMLFeed(feed)
+    assert type(parsed) is type(canteen)
+    assert parsed.toXMLFeed() == feed
+    assert parsed.version == PARSER_VERSION
+    assert parsed.name == canteen.name
+    assert parsed._location == canteen._location
+    assert parsed.feeds == sorted(canteen.feeds, key=lambda f: f.priority)
+    # notes are stored in feed order, which is sorted on serialization
+    assert sorted(parsed._days) == sorted(canteen._days)
+    assert parsed._days[date(2013, 10, 15)]['Essen'][-1][1] == ['b', 'z']
+    assert type(canteen).fromXMLFeed(parsed.toXMLFeed())._days == \
+        parsed._days
+
+
+def test_read_feed_sources(tmpdir):
+    canteen = BaseBuilder()
+    canteen.addMeal(date(2013, 10, 13), 'Essen', 'Gulasch')
+    feed = canteen.toXMLFeed()
+    path = tmpdir.join('feed.xml')
+    path.write_binary(feed.encode('utf-8'))
+    for source in (feed, feed.encode('utf-8'), str(path)):
+        assert BaseBuilder.fromXMLFeed(source)._days == canteen._days
+    with open(str(path), 'rb') as stream:
+        assert BaseBuilder.fromXMLFeed(stream)._days == canteen._days
+    compact = LazyBuilder.fromXMLFeed(feed, compact=True)
+    assert compact.toXMLFeed() == feed
+    assert type(compact._days[date(2013, 10, 13)]['Essen'][0]).__name__ == \
+        'CompactMeal'
+
+
+def test_feed_of_changed_days():
+    old = BaseBuilder()
+    old.name = 'Mensa'
+    old.addMeal(date(2013, 10, 13), 'Essen', 'Gulasch')
+    old.addMeal(date(2013, 10, 14), 'Essen', 'Nudeln')
+    old.addMeal(date(2013, 10, 15), 'Essen', 'Suppe')
+    new = BaseBuilder()
+    new.name = 'Mensa'
+    new.addMeal(date(2013, 10, 13), 'Essen', 'Gulasch')
+    new.setDayClosed(date(2013, 10, 14))
+    feed = new.toXMLFeed(dates=old.diff(new).changedDates())
+    expected = BaseBuilder()
+    expected.name = 'Mensa'
+    expected.setDayClosed(date(2013, 10, 14))
+    expected._days[date(2013, 10, 15)] = {}
+    assert feed == expected.toXMLFeed()
+    assert new.toXMLFeed(dates=[]) == expected.toXMLFeed(dates=[])
+    assert '<day' not in new.toXMLFeed(dates=[])
+    assert new.toXMLFeed(dates=[date(2013, 10, 13)]) == \
+        old.toXMLFeed(dates=[date(2013, 10, 13)])
+
+
+def test_snapshot_round_trip(canteen, tmpdir):
+    fill_full_feed(canteen)
+    canteen._days[date(2013, 10, 16)] = {}
+    canteen.addMeal(date(2013, 10, 15), 'Leer', 'Brot')
+    canteen._days[date(2013, 10, 15)]['Leer'] = []
+    path = str(tmpdir.join('canteen.snapshot'))
+    with open(path, 'wb') as stream:
+        canteen.dump(stream)
+    with open(path, 'rb') as stream:
+        loaded = type(canteen).load(stream)
+    assert type(loaded) is type(canteen)
+    assert loaded._compact == canteen._compact
+    assert loaded.toXMLFeed() == canteen.toXMLFeed()
+    assert loaded.fingerprint() == canteen.fingerprint()
+    assert loaded._days == canteen._days
+    assert loaded.feeds == canteen.feeds
+    stream = BytesIO()
+    canteen.dump(stream)
+    assert BaseBuilder.load(BytesIO(stream.getvalue()),
+                            compact=True).toXMLFeed() == canteen.toXMLFeed()
+
+
+def test_snapshot_single_days(canteen, tmpdir):
+    fill_full_feed(canteen)
+    path = str(tmpdir.join('canteen.snapshot'))
+    with open(path, 'wb') as stream:
+        canteen.dump(stream)
+    with open(path, 'rb') as stream:
+        loaded = type(canteen).load(stream, dates=[date(2013, 10, 13),
+                                                   date(2013, 10, 14),
+                                                   date(2013, 10, 20)])
+    assert loaded.name == canteen.name
+    assert loaded._days == {
+        date(2013, 10, 13): canteen._days[date(2013, 10, 13)],
+        date(2013, 10, 14): False}
+    assert loaded.toXMLFeed() == canteen.toXMLFeed(
+        dates=[date(2013, 10, 13), date(2013, 10, 14)])
+
+
+def test_snapshot_errors(canteen):
+    with pytest.raises(ValueError):
+        BaseBuilder.load(BytesIO(b'<openmensa/>' + b'\0' * 20))
+    stream = BytesIO()
+    canteen.dump(stream)
+    data = stream.getvalue()
+    with pytest.raises(ValueError):
+        BaseBuilder.load(BytesIO(data[:4] + b'\x63\x00' + data[6:]))
+    canteen._days[date(2013, 10, 13)] = {'Essen': [('Gulasch', [],
+                                                    {'guest': 100})]}
+    with pytest.raises(ValueError):
+        canteen.dump(BytesIO())
+    canteen._days[date(2013, 10, 13)] = {'Essen': [('Gulasch', [],
+                                                    {'student': 2 ** 40})]}
+    with pytest.raises(ValueError):
+        canteen.dump(BytesIO())
+
+
+def test_snapshot_truncated(canteen, tmpdir):
+    fill_full_feed(canteen)
+    stream = BytesIO()
+    canteen.dump(stream)
+    data = stream.getvalue()
+    path = tmpdir.join('canteen.snapshot')
+    for size in (0, 3, 20, 200, len(data) - 1):
+        with pytest.raises(ValueError):
+            BaseBuilder.load(BytesIO(data[:size]))
+        path.write_binary(data[:size])
+        with open(str(path), 'rb') as stream:
+            with pytest.raises(ValueError):
+                BaseBuilder.load(stream)
+
+
+def test_snapshot_inside_file(canteen, tmpdir):
+    fill_full_feed(canteen)
+    other = BaseBuilder()
+    other.addMeal(date(2013, 10, 20), 'Essen', 'Suppe')
+    path = str(tmpdir.join('canteens'))
+    with open(path, 'wb') as stream:
+        stream.write(b'header')
+        canteen.dump(stream)
+        other.dump(stream)
+    for opener in (lambda: open(path, 'rb'),
+                   lambda: BytesIO(open(path, 'rb').read())):
+        with opener() as stream:
+            stream.seek(6)
+            assert type(canteen).load(stream).toXMLFeed() == \
+                canteen.toXMLFeed()
+            assert BaseBuilder.load(stream)._days == other._days
+            assert stream.read() == b''
+
+
+def test_snapshot_feed_priorities(canteen):
+    for priority in ('2', None):
+        canteen.define(name=str(priority), priority=priority,
+                       url='http://example.org', source=None, dayOfWeek='*',
+                       dayOfMonth='*', hour='8', minute='0', retry=None)
+    stream = BytesIO()
+    canteen.dump(stream)
+    stream.seek(0)
+    assert type(canteen).load(stream).feeds == canteen.feeds
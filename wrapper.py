@@ -1,10 +1,64 @@
-from urllib.request import urlopen, build_opener
-from urllib.parse import urljoin, urlparse, urlunparse, urlencode
+from urllib.error import HTTPError
+from urllib.request import urlopen, build_opener, Request, HTTPHandler
+try:
+	from urllib.request import HTTPSHandler
+except ImportError:  # python without ssl support
+	pass
+from urllib.parse import urljoin, urlparse, urlunparse, urlencode, parse_qsl
+from collections import deque, namedtuple, OrderedDict
+import codecs
+import copy
+import hashlib
+import http.client
+import os
+import pickle
 import re
 import json
+import math
+import threading
+import time
 
 from .fields import Field
 
+try:
+	import orjson
+except ImportError:  # orjson is optional, see setJsonBackend
+	orjson = None
+
+# seconds spent in connect() by the current thread
+connectTimes = threading.local()
+
+
+class TimedConnectMixin(object):
+	def connect(self):
+		start = time.perf_counter()
+		try:
+			super(TimedConnectMixin, self).connect()
+		finally:
+			connectTimes.value = getattr(connectTimes, 'value', 0.0) + time.perf_counter() - start
+
+
+class TimedOpenMixin(object):
+	""" Opens the connections of a handler with its `connectionClass`. """
+	def do_open(self, http_class, req, **kwargs):
+		return super(TimedOpenMixin, self).do_open(self.connectionClass, req, **kwargs)
+
+
+class TimedHTTPHandler(TimedOpenMixin, HTTPHandler):
+	""" Handler which reports the connect time of its connections to
+	:class:`RequestTrace`. """
+	connectionClass = type('TimedHTTPConnection', (TimedConnectMixin, http.client.HTTPConnection), {})
+
+
+timedHandlers = [TimedHTTPHandler]
+if hasattr(http.client, 'HTTPSConnection'):
+	class TimedHTTPSHandler(TimedOpenMixin, HTTPSHandler):
+		""" HTTPS counterpart of :class:`TimedHTTPHandler`. """
+		connectionClass = type('TimedHTTPSConnection', (TimedConnectMixin, http.client.HTTPSConnection), {})
+
+	timedHandlers.append(TimedHTTPSHandler)
+
+
 class ModelMeta(type):
 	def __new__(cls, name, bases, attrs):
 		doctype = attrs.setdefault('_type', name)
@@ -18,43 +72,691 @@ class ModelMeta(type):
 			if issubclass(type(element), Field):
 				fields[elementname] = attrs.pop(elementname)
 		attrs['_fields'] = fields
+		# store the fields in slots instead of an instance dict
+		attrs.setdefault('__slots__', tuple(fieldname for fieldname in fields
+			if not any(hasattr(base, fieldname) for base in bases)))
 		finishedModel = type.__new__(cls, name, bases, attrs)
 		for fieldname in fields:
 			field = fields[fieldname]
 			field._model = finishedModel
 			field.init(fieldname)
+		if 'fromJsonDict' not in attrs:
+			finishedModel.fromJsonDict = compileDecoder(name, fields)
 		return finishedModel
 
+	def __call__(cls, *args, **kwargs):
+		# return already loaded entities of identity maps
+		entity = cls._lookup(*args, **kwargs)
+		if entity is None:
+			entity = type.__call__(cls, *args, **kwargs)
+		return entity
+
+
+def compileDecoder(modelName, fields):
+	""" Generates the `fromJsonDict` method for a model with `fields`: the
+	same as :meth:`Entity.fromJsonDict`, but with every field inlined
+	instead of a loop over `Field.fromJsonDict` calls. Fields overwriting
+	`fromJsonDict` are still called. """
+	lines = ['def fromJsonDict(self, jsonDict):', '\tget = jsonDict.get']
+	namespace = {}
+	for index, fieldname in enumerate(fields):
+		field = fields[fieldname]
+		namespace['field{0}'.format(index)] = field
+		if type(field).fromJsonDict is not Field.fromJsonDict:
+			lines.append('\tself.{0} = field{1}.fromJsonDict(jsonDict)'.format(fieldname, index))
+			continue
+		namespace['name{0}'.format(index)] = field.name
+		namespace['default{0}'.format(index)] = field.default
+		namespace['convert{0}'.format(index)] = field.convertFunc
+		lines.append('\tvalue = get(name{0}, default{0})'.format(index))
+		if field.convertFunc is Field.convertFunc:
+			converted = 'value'
+		else:
+			converted = 'convert{0}(value)'.format(index)
+		if field.null:
+			converted = 'None if value is None else ' + converted
+		lines.append('\tself.{0} = {1}'.format(fieldname, converted))
+	exec(compile('\n'.join(lines), '<{0} decoder>'.format(modelName), 'exec'), namespace)
+	return namespace['fromJsonDict']
+
 
 class Entity(object, metaclass=ModelMeta):
 	default_api_base = None
-	default_opener = build_opener()
-	charset_pattern = re.compile('.*charset=(?P<encoding>[\w-]+)')
+	default_opener = build_opener(*timedHandlers)
+	charset_pattern = re.compile(r'.*charset=(?P<encoding>[\w-]+)')
+
+	#: :class:`ResponseCache` used by all entities without own cache;
+	#: `None` disables caching
+	default_cache = None
+	#: :class:`RequestObserver` instances informed about all requests
+	observers = []
 
-	def __init__(self, api_base=None, opener=None):
+	__slots__ = ('api_base', 'opener', 'cache', 'response', 'headers')
+
+	def __init__(self, api_base=None, opener=None, cache=None):
 		self.api_base = api_base or self.default_api_base
 		self.opener = opener or self.default_opener
+		self.cache = cache if cache is not None else self.default_cache
+
+	@classmethod
+	def _lookup(cls, *args, **kwargs):
+		""" Hook called with the constructor arguments before a new entity
+		is created; returning an existing entity skips the creation. """
+		return None
 
 	def fromJsonDict(self, jsonDict):
+		""" Sets all fields from the decoded JSON object `jsonDict`. Models
+		get a generated version of this method (see :func:`compileDecoder`). """
 		for name in self._fields:
 			setattr(self, name, self._fields[name].fromJsonDict(jsonDict))
 
+	def url(self, name, params={}):
+		""" Builds the url for the API endpoint `name` with the query
+		parameters `params` (relative to `api_base`). """
+		return buildUrl(self.api_base, name, params)
+
 	def request(self, name, params={}):
+		""" Fetches the API endpoint `name` and returns the decoded content.
+		With a `cache` fresh responses are returned without any request,
+		stale ones are revalidated with If-None-Match/If-Modified-Since;
+		`response` is `None` if no request has been sent. The headers of
+		the (cached) response are stored as `headers`. """
+		start = time.perf_counter()
 		# build url with api_base, name + params
-		response = self.opener.open(urlunparse(
-			list(urlparse(urljoin(self.api_base, name))[0:4]) +
-			[ urlencode(params), None ]
-		))
-		# read content, decode to string if possible
-		contentType = response.headers['Content-Type'] or ''
-		charsettest = self.charset_pattern.match(contentType)
-		if charsettest:
-			content = response.readall().decode(charsettest.group('encoding'))
+		url = self.url(name, params)
+		return self._fetch(url, RequestTrace(self, url, time.perf_counter() - start))
+
+	def fetch(self, url):
+		""" Same as :meth:`request` for an already built `url`. """
+		return self._fetch(url, RequestTrace(self, url))
+
+	def _fetch(self, url, trace):
+		cache = self.cache
+		if cache is None:
+			entry = None
+			request = url
 		else:
-			content = response.readall()
-		# parse content-type
-		if contentType.startswith('application/json'):
-			content = json.loads(content)
+			entry = cache.get(url)
+			if entry is not None and entry.expires > time.time():
+				cache._count('hits')
+				self.response = None
+				self.headers = entry.headers
+				trace.finish(None, 'hit')
+				return entry.content
+			request = Request(url, headers=entry.conditionalHeaders() if entry else {})
+		try:
+			response = trace.open(self.opener, request)
+		except HTTPError as error:
+			if error.code != 304 or entry is None:
+				trace.fail(error)
+				raise
+			# not modified: reuse the already decoded content
+			cache._count('revalidations')
+			cache.set(url, entry._replace(expires=cache.expires(error.headers)))
+			self.response = error
+			self.headers = entry.headers
+			trace.finish(304, 'revalidated')
+			return entry.content
+		except Exception as error:
+			trace.fail(error)
+			raise
+		stream = CountingReader(response)
+		# the raw body is only referenced by decodeContent and freed as
+		# soon as it has been parsed
+		content = decodeContent(response.headers['Content-Type'], stream.read(), trace.mark)
 		# store response object for advanced usage
 		self.response = response
+		self.headers = response.headers
+		if cache is not None:
+			cache._count('misses')
+			cache.store(url, content, response.headers)
+		trace.finish(response.status, None if cache is None else 'miss', stream.count)
 		return content
+
+	def iterRequest(self, name, params={}):
+		""" Requests an API endpoint returning a JSON array and yields its
+		decoded elements while the response is read (see
+		:func:`iterJsonArray`). The responses are not cached. """
+		start = time.perf_counter()
+		url = self.url(name, params)
+		trace = RequestTrace(self, url, time.perf_counter() - start)
+		try:
+			response = trace.open(self.opener, url)
+		except Exception as error:
+			trace.fail(error)
+			raise
+		self.response = response
+		self.headers = response.headers
+		contentType = response.headers['Content-Type'] or ''
+		if not contentType.startswith('application/json'):
+			response.close()
+			error = ValueError('expected a JSON response, got ' + repr(contentType))
+			trace.fail(error)
+			raise error
+		charsettest = self.charset_pattern.match(contentType)
+		stream = CountingReader(response)
+		with response:
+			for element in iterJsonArray(stream,
+					charsettest.group('encoding') if charsettest else 'utf-8'):
+				yield element
+		trace.mark('stream')
+		trace.finish(response.status, None, stream.count)
+
+
+def buildUrl(api_base, name, params={}):
+	""" Joins `api_base` and `name` and appends the encoded query
+	parameters. """
+	return urlunparse(
+		list(urlparse(urljoin(api_base, name))[0:4]) +
+		[ urlencode(params), None ]
+	)
+
+
+def decodeContent(contentType, content, mark=None):
+	""" Decodes a response body to string if its content type contains a
+	charset and parses JSON documents; UTF-8 encoded JSON is parsed
+	directly from the bytes without a decoded copy. `mark` is called with
+	the name of every finished phase (`read`, `decode`, `parse`). """
+	if mark:
+		mark('read')
+	contentType = contentType or ''
+	# read content, decode to string if possible
+	charsettest = Entity.charset_pattern.match(contentType)
+	encoding = charsettest.group('encoding') if charsettest else None
+	isJson = contentType.startswith('application/json')
+	if encoding and not (isJson and encoding.lower().replace('_', '-') in ('utf-8', 'utf8')):
+		content = content.decode(encoding)
+		if mark:
+			mark('decode')
+	# parse content-type
+	if isJson:
+		content = loadJson(content)
+		if mark:
+			mark('parse')
+	return content
+
+
+#: JSON parsers usable by :func:`setJsonBackend`
+jsonBackends = {'json': json.loads}
+if orjson is not None:
+	jsonBackends['orjson'] = orjson.loads
+loadJson = json.loads
+
+
+def setJsonBackend(name='auto'):
+	""" Selects the parser for JSON responses of :meth:`Entity.request`
+	and :class:`AsyncClient`: `json` (standard library, default), `orjson`
+	(faster and less memory, needs the orjson package) or `auto` (the
+	fastest installed one). Streamed responses (:meth:`Entity.iterRequest`)
+	always use the standard library.
+
+	:raises ValueError: for unknown or not installed backends
+	:returns: name of the selected backend """
+	global loadJson
+	if name == 'auto':
+		name = 'orjson' if 'orjson' in jsonBackends else 'json'
+	if name not in jsonBackends:
+		raise ValueError('JSON backend {0!r} is not available'.format(name))
+	loadJson = jsonBackends[name]
+	return name
+
+
+jsonDecoder = json.JSONDecoder()
+whitespace = ' \t\n\r'
+numberCharacters = frozenset('0123456789+-.eE')
+
+
+def iterJsonArray(stream, encoding='utf-8', chunkSize=16384):
+	""" Incrementally decodes a JSON array from the binary file-like
+	`stream` and yields every element as soon as it has been read
+	completely; at most one element and one chunk are buffered. """
+	# read1 returns the already received data instead of waiting for
+	# `chunkSize` bytes
+	read = getattr(stream, 'read1', stream.read)
+	decoder = codecs.getincrementaldecoder(encoding)()
+	buffer = ''
+	position = 0
+	eof = False
+	# allowed next tokens, None stands for an element
+	expected = ('[',)
+	while True:
+		while position < len(buffer) and buffer[position] in whitespace:
+			position += 1
+		if position < len(buffer):
+			token = buffer[position]
+			if token in expected:
+				position += 1
+				if token == ']':
+					return
+				expected = (None,) if token == ',' else (']', None)
+				continue
+			if None not in expected:
+				raise ValueError('unexpected {0!r} in JSON array'.format(token))
+			try:
+				element, end = jsonDecoder.raw_decode(buffer, position)
+			except ValueError:
+				if eof:
+					raise
+			else:
+				# a number is only complete if anything but a number character
+				# follows it, e.g. `1.` might continue as `1.5`
+				if type(element) in (int, float) and not eof:
+					numberEnd = end
+					while numberEnd < len(buffer) and buffer[numberEnd] in numberCharacters:
+						numberEnd += 1
+					complete = numberEnd < len(buffer)
+				else:
+					complete = True
+				if complete:
+					yield element
+					position = end
+					expected = (',', ']')
+					continue
+		elif eof:
+			raise ValueError('unexpected end of JSON array')
+		chunk = read(chunkSize)
+		eof = not chunk
+		buffer = buffer[position:] + decoder.decode(chunk, final=eof)
+		position = 0
+
+
+#: Details of one request reported to :meth:`RequestObserver.responseReceived`:
+#: `status` is `None` for fresh cache hits, `cache` one of `None`
+#: (no cache), `'hit'`, `'miss'` or `'revalidated'`, `bytes` the size of
+#: the received body and `timings` maps the phases of the request to
+#: seconds: `url` (building the url), `connect` (opening new connections),
+#: `firstByte` (sending the request up to the response headers without
+#: `connect`), `read`, `decode` (charset), `parse` (JSON) or `stream` (read
+#: and parse of :meth:`Entity.iterRequest`) and `total`.
+RequestMetrics = namedtuple('RequestMetrics', ['url', 'endpoint', 'status', 'cache', 'bytes', 'timings'])
+
+
+class RequestObserver(object):
+	""" Base class for hooks into :meth:`Entity.request`; add instances to
+	:attr:`Entity.observers`. All methods do nothing by default and are
+	called in the thread of the request. """
+	def requestStarted(self, entity, url):
+		pass
+
+	def responseReceived(self, entity, metrics):
+		""" :param RequestMetrics metrics: timings of the request """
+		pass
+
+	def requestFailed(self, entity, url, error):
+		pass
+
+
+class RequestTrace(object):
+	""" Measures the phases of a single request and informs the observers
+	of `entity`. """
+	def __init__(self, entity, url, urlTime=0.0):
+		self.entity = entity
+		self.url = url
+		self.observers = entity.observers
+		self.timings = OrderedDict([('url', urlTime)])
+		self.start = self.last = time.perf_counter()
+		for observer in self.observers:
+			observer.requestStarted(entity, url)
+
+	def open(self, opener, request):
+		connectTimes.value = 0.0
+		try:
+			return opener.open(request)
+		finally:
+			connect = connectTimes.value
+			self.timings['connect'] = connect
+			self.mark('firstByte')
+			self.timings['firstByte'] -= connect
+
+	def mark(self, phase):
+		""" Assigns the time since the previous phase to `phase`. """
+		now = time.perf_counter()
+		self.timings[phase] = self.timings.get(phase, 0.0) + now - self.last
+		self.last = now
+
+	def finish(self, status, cache, size=0):
+		self.timings['total'] = self.timings['url'] + time.perf_counter() - self.start
+		if not self.observers:
+			return
+		metrics = RequestMetrics(self.url, endpointName(self.entity.api_base, self.url),
+			status, cache, size, self.timings)
+		for observer in self.observers:
+			observer.responseReceived(self.entity, metrics)
+
+	def fail(self, error):
+		for observer in self.observers:
+			observer.requestFailed(self.entity, self.url, error)
+
+
+class CountingReader(object):
+	""" Wraps a binary stream and counts the read bytes. """
+	def __init__(self, stream):
+		self.stream = stream
+		self.count = 0
+
+	def read(self, size=-1):
+		data = self.stream.read(size)
+		self.count += len(data)
+		return data
+
+	def read1(self, size=-1):
+		data = self.stream.read1(size)
+		self.count += len(data)
+		return data
+
+
+datePattern = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def endpointName(api_base, url):
+	""" Groups request urls by endpoint: the path relative to `api_base`
+	with ids replaced by `:id` and dates by `:date`, e.g.
+	`canteens/:id/days/:date/meals`. """
+	path = urlparse(url).path
+	basePath = urlparse(api_base or '').path
+	if path.startswith(basePath):
+		path = path[len(basePath):]
+	return '/'.join(':id' if segment.isdigit() else
+		':date' if datePattern.match(segment) else segment
+		for segment in path.split('/'))
+
+
+#: Statistics of one endpoint reported by :meth:`MetricsAggregator.report`,
+#: `p50` and `p95` in seconds, `bytes` summed up.
+EndpointStats = namedtuple('EndpointStats', ['count', 'p50', 'p95', 'bytes'])
+
+
+def percentile(values, fraction):
+	""" Nearest-rank percentile of the sorted list `values`. """
+	return values[max(0, int(math.ceil(fraction * len(values))) - 1)]
+
+
+class MetricsAggregator(RequestObserver):
+	""" Observer which keeps the last `maxSamples` requests per endpoint in
+	memory and reports their percentiles.
+
+	.. code:: python
+
+		metrics = MetricsAggregator()
+		Entity.observers.append(metrics)
+		...
+		for endpoint, stats in metrics.report().items():
+			print(endpoint, stats.p50, stats.p95)
+	"""
+	def __init__(self, maxSamples=10000):
+		self.maxSamples = maxSamples
+		self._lock = threading.Lock()
+		self._samples = {}
+		self.failures = 0
+
+	def responseReceived(self, entity, metrics):
+		with self._lock:
+			samples = self._samples.get(metrics.endpoint)
+			if samples is None:
+				samples = self._samples[metrics.endpoint] = deque(maxlen=self.maxSamples)
+			samples.append(metrics)
+
+	def requestFailed(self, entity, url, error):
+		with self._lock:
+			self.failures += 1
+
+	def report(self, phase='total'):
+		""" Returns :class:`EndpointStats` per endpoint for `phase` (see
+		:class:`RequestMetrics`). """
+		with self._lock:
+			samples = dict((endpoint, list(metrics)) for endpoint, metrics in self._samples.items())
+		report = {}
+		for endpoint, metrics in samples.items():
+			durations = sorted(sample.timings.get(phase, 0.0) for sample in metrics)
+			report[endpoint] = EndpointStats(len(durations), percentile(durations, 0.5),
+				percentile(durations, 0.95), sum(sample.bytes for sample in metrics))
+		return report
+
+	def clear(self):
+		with self._lock:
+			self._samples.clear()
+			self.failures = 0
+
+
+#: Statistics of an :class:`IdentityMap` like :class:`ResponseCacheInfo`
+IdentityMapInfo = namedtuple('IdentityMapInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class IdentityMap(object):
+	""" Thread-safe mapping from ids to loaded entities, so that every
+	entity exists once per process and is not requested again. Keeps at
+	most `maxsize` entities (least recently used ones are dropped first)
+	for at most `ttl` seconds (`None`: forever).
+	"""
+	def __init__(self, maxsize=4096, ttl=3600):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._entities = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, id, default=None):
+		""" Returns the entity for `id` and counts the lookup. """
+		with self._lock:
+			entity = self._lookup(id)
+			if entity is None:
+				self.misses += 1
+				return default
+			self.hits += 1
+			self._entities.move_to_end(id)
+			return entity
+
+	def peek(self, id):
+		""" Returns the entity for `id` or `None` without counting. """
+		with self._lock:
+			return self._lookup(id)
+
+	def _lookup(self, id):
+		# callers hold the lock
+		item = self._entities.get(id)
+		if item is None:
+			return None
+		if item[1] is not None and item[1] <= time.time():
+			del self._entities[id]
+			return None
+		return item[0]
+
+	def add(self, id, entity):
+		with self._lock:
+			self._entities[id] = (entity, None if self.ttl is None else time.time() + self.ttl)
+			self._entities.move_to_end(id)
+			while len(self._entities) > self.maxsize:
+				self._entities.popitem(last=False)
+
+	def invalidate(self, id=None):
+		""" Drops the entity for `id` or all entities. """
+		with self._lock:
+			if id is None:
+				self._entities.clear()
+			else:
+				self._entities.pop(id, None)
+
+	def info(self):
+		""" :rtype: :class:`IdentityMapInfo` """
+		with self._lock:
+			return IdentityMapInfo(self.hits, self.misses, self.maxsize, len(self._entities))
+
+	def __contains__(self, id):
+		return self.peek(id) is not None
+
+	def __getitem__(self, id):
+		entity = self.peek(id)
+		if entity is None:
+			raise KeyError(id)
+		return entity
+
+	__setitem__ = add
+
+	def __len__(self):
+		return len(self._entities)
+
+
+#: Statistics of a :class:`ResponseCache`: fresh `hits`, `misses` (full
+#: downloads) and `revalidations` (`304 Not Modified` responses).
+ResponseCacheInfo = namedtuple('ResponseCacheInfo', ['hits', 'misses', 'revalidations', 'currsize'])
+
+
+class CachedResponse(namedtuple('CachedResponse', ['content', 'headers', 'etag', 'lastModified', 'expires'])):
+	""" Decoded content and headers of a response with its validators and
+	the time (seconds since the epoch) until which it is fresh. """
+	def conditionalHeaders(self):
+		headers = {}
+		if self.etag:
+			headers['If-None-Match'] = self.etag
+		if self.lastModified:
+			headers['If-Modified-Since'] = self.lastModified
+		return headers
+
+
+class ResponseCache(object):
+	""" In-memory cache for :meth:`Entity.request` keyed by the final
+	request url. Responses are fresh for `max-age` of their Cache-Control
+	header or `ttl` seconds otherwise, afterwards they are revalidated.
+	The cached content is shared between all requests and must not be
+	modified.
+
+	:param float ttl: default lifetime of responses in seconds
+	:param int maxsize: number of kept responses, the least recently
+		used ones are dropped first
+	"""
+	maxAgePattern = re.compile(r'max-age=(?P<seconds>\d+)')
+
+	def __init__(self, ttl=300, maxsize=1024):
+		self.ttl = ttl
+		self.maxsize = maxsize
+		self._lock = threading.Lock()
+		self._entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.revalidations = 0
+
+	def get(self, url):
+		with self._lock:
+			entry = self._entries.get(url)
+			if entry is not None:
+				self._entries.move_to_end(url)
+			return entry
+
+	def set(self, url, entry):
+		with self._lock:
+			self._entries[url] = entry
+			self._entries.move_to_end(url)
+			while len(self._entries) > self.maxsize:
+				self._entries.popitem(last=False)
+
+	def delete(self, url):
+		with self._lock:
+			self._entries.pop(url, None)
+
+	def clear(self):
+		""" Drops all responses and resets the statistics. """
+		with self._lock:
+			self._entries.clear()
+			self.hits = self.misses = self.revalidations = 0
+
+	def size(self):
+		return len(self._entries)
+
+	def info(self):
+		""" :rtype: :class:`ResponseCacheInfo` """
+		return ResponseCacheInfo(self.hits, self.misses, self.revalidations, self.size())
+
+	def expires(self, headers):
+		""" Returns until when a response with `headers` is fresh. """
+		ttl = self.ttl
+		match = self.maxAgePattern.search(headers.get('Cache-Control') or '')
+		if match:
+			ttl = int(match.group('seconds'))
+		return time.time() + ttl
+
+	def store(self, url, content, headers):
+		""" Stores a downloaded response unless it forbids storing or has
+		no validators and no lifetime. """
+		cacheControl = headers.get('Cache-Control') or ''
+		if 'no-store' in cacheControl:
+			return
+		entry = CachedResponse(content, headers, headers.get('ETag'),
+			headers.get('Last-Modified'), self.expires(headers))
+		if entry.etag or entry.lastModified or entry.expires > time.time():
+			self.set(url, entry)
+
+	def _count(self, counter):
+		with self._lock:
+			setattr(self, counter, getattr(self, counter) + 1)
+
+
+class DiskResponseCache(ResponseCache):
+	""" :class:`ResponseCache` which keeps the responses as pickle files
+	inside `directory`, so they survive the process. `maxsize` is not
+	enforced. """
+	def __init__(self, directory, ttl=300):
+		super(DiskResponseCache, self).__init__(ttl=ttl, maxsize=None)
+		self.directory = directory
+		os.makedirs(directory, exist_ok=True)
+
+	def path(self, url):
+		return os.path.join(self.directory,
+			hashlib.sha1(url.encode('utf-8')).hexdigest() + '.pickle')
+
+	def get(self, url):
+		try:
+			with open(self.path(url), 'rb') as stream:
+				storedUrl, entry = pickle.load(stream)
+		except (OSError, EOFError, pickle.UnpicklingError):
+			return None
+		if storedUrl != url or len(entry) != len(CachedResponse._fields):
+			return None
+		return CachedResponse(*entry)
+
+	def set(self, url, entry):
+		path = self.path(url)
+		temporary = '{0}.{1}.{2}'.format(path, os.getpid(), threading.get_ident())
+		with open(temporary, 'wb') as stream:
+			pickle.dump((url, tuple(entry)), stream, pickle.HIGHEST_PROTOCOL)
+		os.replace(temporary, path)
+
+	def delete(self, url):
+		try:
+			os.remove(self.path(url))
+		except OSError:
+			pass
+
+	def clear(self):
+		for name in os.listdir(self.directory):
+			if name.endswith('.pickle'):
+				os.remove(os.path.join(self.directory, name))
+		with self._lock:
+			self.hits = self.misses = self.revalidations = 0
+
+	def size(self):
+		return sum(1 for name in os.listdir(self.directory) if name.endswith('.pickle'))
+
+
+linkPattern = re.compile(r'<(?P<url>[^>]*)>\s*;\s*rel="?next"?')
+
+
+def nextPageUrl(url, headers):
+	""" Returns the url of the page following the response of `url` based
+	on its Link header (`rel="next"`) or its X-Total-Pages header and the
+	current page (`page` parameter of `url`, the X-Current-Page header or
+	the first page); `None` for the last page. """
+	link = linkPattern.search(headers.get('Link') or '')
+	if link:
+		return urljoin(url, link.group('url'))
+	total = headers.get('X-Total-Pages')
+	if not total:
+		return None
+	parts = urlparse(url)
+	params = parse_qsl(parts.query)
+	current = dict(params).get('page') or headers.get('X-Current-Page') or 1
+	if int(current) >= int(total):
+		return None
+	params = [(name, value) for name, value in params if name != 'page']
+	params.append(('page', str(int(current) + 1)))
+	return urlunparse(parts[:4] + (urlencode(params), parts[5]))